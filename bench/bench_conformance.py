@@ -0,0 +1,500 @@
+"""Differential conformance benchmark: every engine must print what the reference does.
+
+Each program runs through every engine in ``ENGINES`` (both lexers and parsers,
+``-O``, tiering, memoization and all of them at once), via :func:`main.run_file`
+as the command line runs it. What an engine writes to stdout
+and stderr, and the error it raises, must match the reference tree-walking run
+(PLY lexer, yacc parser, no optimization) byte for byte. The time of every run is
+recorded in the same pass, so a divergence and a slowdown show up together.
+
+The programs are the hand-written ones in ``test/`` and random well-typed ones
+built from the statements of the grammar in ``common.parser``: declarations,
+assignments, ``if``/``else``, counted ``while`` loops, ``for`` loops over ranges
+and generators, functions with ``return``, generator functions with ``yield``, and
+now and then a statement that fails at run time.
+
+Usage::
+
+    python bench/bench_conformance.py [N] [SEED] [TIMEOUT]
+
+runs the corpus and N random programs (100 by default) generated from SEED, each
+run stopped after TIMEOUT seconds (30 by default). It exits with status 1 if any
+engine diverged or timed out; every such program is kept in
+``conformance-failures/`` to be replayed with ``src/main.py``. The time limit uses
+``SIGALRM``, so the benchmark needs a Unix system.
+"""
+
+import contextlib
+import difflib
+import glob
+import io
+import os
+import random
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+from support import SRC_DIR  # isort: skip
+
+from common.interpreter import MODULES
+from common.purity import Memo
+from common.tiering import Tier
+from main import run_file
+
+TEST_DIR = os.path.join(SRC_DIR, "..", "test")
+FAILURES_DIR = "conformance-failures"
+# What the corpus programs read with input(), the answers test_program2 expects.
+STDIN = "Ana\n14\n3\n\n"
+
+# Name, then the run_file arguments; Tiers and Memos are created afresh per run.
+ENGINES = [
+    ("reference", {"lexer": "ply", "backend": "yacc"}),
+    ("fast lexer", {"lexer": "fast", "backend": "yacc"}),
+    ("pratt", {"lexer": "fast", "backend": "pratt"}),
+    ("pratt, ply lexer", {"lexer": "ply", "backend": "pratt"}),
+    ("-O", {"optimized": True}),
+    ("tiered", {"tier": Tier}),
+    ("tiered, threshold 1", {"tier": lambda: Tier(1)}),
+    ("memoized", {"memo": Memo}),
+    (
+        "all, threshold 1",
+        {
+            "lexer": "fast",
+            "backend": "pratt",
+            "optimized": True,
+            "tier": lambda: Tier(1),
+            "memo": Memo,
+        },
+    ),
+]
+
+_WORDS = ("a", "b", "ab", "x y", "", "MyLang", "0")
+
+
+class ProgramGenerator:
+    """Generates a random well-typed MyLang program, see :meth:`program`."""
+
+    def __init__(self, seed):
+        """
+        Initializes a new ProgramGenerator.
+
+        :param seed: The seed of the random choices.
+        """
+        self.random = random.Random(seed)
+        self.lines = []
+        self.scopes = []  # one {name: type} dict per enclosing block
+        self.readonly = set()  # loop counters and loop variables
+        self.functions = {}  # name -> (parameter types, return type)
+        self.producers = []  # generator functions taking a count
+        self.stages = []  # generator functions taking a generator
+        self.names = 0
+        self.indent = 0
+        self.loop_depth = 0
+        self.string_reads = 0  # string variables the current expression may read
+
+    def program(self):
+        """
+        Generates the program: a few functions and generator functions, then the
+        main statements, which may end with one that fails.
+
+        :return: The program source.
+        """
+        self.scopes = [{"acc": "int"}]
+        self.emit("var acc = 0;")
+        for _ in range(self.random.randint(0, 3)):
+            self.function()
+        for _ in range(self.random.randint(0, 2)):
+            self.generator_function()
+        self.block(self.random.randint(4, 10))
+        if self.random.random() < 0.25:
+            self.failure()
+        self.emit('print("acc: " + acc);')
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line):
+        """Adds a line at the current indentation."""
+        self.lines.append("    " * self.indent + line)
+
+    def name(self, prefix):
+        """Returns a new variable or function name."""
+        self.names += 1
+        return f"{prefix}{self.names}"
+
+    def visible(self, kind, writable=False):
+        """Returns the names of the visible variables of a type."""
+        names = [n for scope in self.scopes for n, k in scope.items() if k == kind]
+        if writable:
+            names = [n for n in names if n not in self.readonly]
+        return names
+
+    def atom(self, kind):
+        """Generates a literal or a variable of a type."""
+        names = self.visible(kind)
+        if kind == "str":
+            # Reading one string per expression keeps assignments in loops from
+            # doubling the length of a string on every iteration.
+            names = names if self.string_reads else []
+        if names and self.random.random() < 0.6:
+            if kind == "str":
+                self.string_reads -= 1
+            return self.random.choice(names)
+        if kind == "int":
+            return str(self.random.randint(0, 20))
+        if kind == "float":
+            return self.random.choice(("0.5", "1.25", "2.0", "3.75"))
+        if kind == "str":
+            return f'"{self.random.choice(_WORDS)}"'
+        return self.random.choice(("true", "false"))
+
+    def expr(self, kind, depth=0):  # pylint: disable=R0911
+        """
+        Generates an expression of a type.
+
+        Products only have small constant factors, quotients constant divisors,
+        and an expression reads at most one string variable, so values stay
+        small however often a loop applies them.
+
+        :param kind: "int", "float", "str" or "bool".
+        :param depth: The nesting depth so far.
+        :return: The expression source.
+        """
+        rnd = self.random
+        if depth == 0:
+            self.string_reads = 1
+        if depth >= 3 or rnd.random() < 0.35:
+            return self.atom(kind)
+        calls = [n for n, (_params, ret) in self.functions.items() if ret == kind]
+        if calls and rnd.random() < 0.15:
+            return self.call(rnd.choice(calls), depth)
+        sub = depth + 1
+        if kind == "int":
+            choice = rnd.randrange(3)
+            if choice == 0:
+                op = rnd.choice("+-")
+                return f"({self.expr('int', sub)} {op} {self.expr('int', sub)})"
+            if choice == 1:
+                return f"({self.expr('int', sub)} * {rnd.randint(-2, 3)})"
+            return f"-{self.atom('int')}"
+        if kind == "float":
+            number = rnd.choice(("int", "float"))
+            if rnd.random() < 0.5:
+                divisor = rnd.choice(("2", "4", "0.5", "8.0"))
+                return f"({self.expr(number, sub)} / {divisor})"
+            op = rnd.choice("+-")
+            return f"({self.expr('float', sub)} {op} {self.expr(number, sub)})"
+        if kind == "str":
+            other = rnd.choice(("str", "str", "int", "float"))
+            return f"({self.expr('str', sub)} + {self.expr(other, sub)})"
+        choice = rnd.randrange(4)
+        if choice == 0:
+            op = rnd.choice(("<", "<=", ">", ">=", "==", "!="))
+            number = rnd.choice(("int", "float"))
+            return f"({self.expr(number, sub)} {op} {self.expr('int', sub)})"
+        if choice == 1:
+            op = rnd.choice(("==", "!="))
+            return f"({self.expr('str', sub)} {op} {self.expr('str', sub)})"
+        if choice == 2:
+            op = rnd.choice(("and", "or"))
+            return f"({self.expr('bool', sub)} {op} {self.expr('bool', sub)})"
+        return f"not {self.atom('bool')}"
+
+    def call(self, name, depth=0):
+        """Generates a call of a function with arguments of its parameter types."""
+        params, _ret = self.functions[name]
+        args = ", ".join(self.expr(kind, depth + 1) for kind in params)
+        return f"{name}({args})"
+
+    def block(self, size, returns=None):
+        """
+        Generates the statements of a block.
+
+        :param size: The number of statements.
+        :param returns: The return type inside a function, else None.
+        """
+        for _ in range(size):
+            self.statement(returns)
+
+    def scope(self, size, returns=None):
+        """Generates a block that runs in a new scope, between braces."""
+        self.indent += 1
+        self.scopes.append({})
+        self.block(size, returns)
+        self.scopes.pop()
+        self.indent -= 1
+
+    # pylint: disable=R0912
+    def statement(self, returns=None):
+        """Generates a statement, see :meth:`block`."""
+        rnd = self.random
+        kind = rnd.choice(("int", "int", "float", "str", "bool"))
+        choice = rnd.randrange(10)
+        nested = len(self.scopes) < 4
+        if choice == 0 or (choice <= 3 and not self.visible(kind, writable=True)):
+            name = self.name("v")
+            self.emit(f"var {name} = {self.expr(kind)};")
+            self.scopes[-1][name] = kind
+        elif choice <= 3:
+            name = rnd.choice(self.visible(kind, writable=True))
+            self.emit(f"{name} = {self.expr(kind)};")
+        elif choice == 4:
+            self.emit(f"print({self.expr(kind)});")
+        elif choice == 5 and nested:
+            self.emit(f"if ({self.expr('bool')}) {{")
+            self.scope(rnd.randint(1, 3), returns)
+            if rnd.random() < 0.5:
+                self.emit("} else {")
+                self.scope(rnd.randint(1, 3), returns)
+            self.emit("}")
+        elif choice == 6 and nested:
+            self.counted_loop(returns)
+        elif choice == 7 and nested:
+            self.for_loop(returns)
+        elif choice == 8 and self.functions:
+            self.emit(f"{self.call(rnd.choice(list(self.functions)))};")
+        elif choice == 9 and returns and rnd.random() < 0.3:
+            self.emit(f"return {self.expr(returns)};")
+        elif rnd.random() < 0.5:
+            self.emit(f"acc = acc + {self.expr('int')};")
+        else:
+            self.emit(f'print("{kind}: " + {self.expr(kind)});')
+
+    # pylint: enable=R0912
+
+    def trip_count(self):
+        """Returns a loop's trip count: enough to get hot at the top level only."""
+        if self.loop_depth == 0 and self.random.random() < 0.5:
+            return self.random.randint(90, 130)
+        return self.random.randint(0, 4)
+
+    def counted_loop(self, returns):
+        """Generates ``while (c < n) { ...; c = c + 1; }``, the form -O counts."""
+        counter = self.name("c")
+        self.emit(f"var {counter} = 0;")
+        self.emit(f"while ({counter} < {self.trip_count()}) {{")
+        self.scopes[-1][counter] = "int"
+        self.readonly.add(counter)
+        self.loop_depth += 1
+        self.scope(self.random.randint(1, 3), returns)
+        self.loop_depth -= 1
+        self.emit(f"    {counter} = {counter} + 1;")
+        self.emit("}")
+
+    def for_loop(self, returns):
+        """Generates a ``for`` loop over a range or over a generator pipeline."""
+        rnd = self.random
+        name = self.name("i")
+        if self.producers and rnd.random() < 0.4:
+            source = f"{rnd.choice(self.producers)}({self.trip_count()})"
+            for _ in range(rnd.randint(0, 2) if self.stages else 0):
+                source = f"{rnd.choice(self.stages)}({source})"
+            self.emit(f"for ({name} in {source}) {{")
+        else:
+            start = rnd.randint(-3, 5)
+            end = start + self.trip_count() - 1
+            step = rnd.choice(("", "", " step 2", " step -1"))
+            if step == " step -1":
+                start, end = end, start
+            self.emit(f"for ({name} in {start}..{end}{step}) {{")
+        self.readonly.add(name)
+        self.scopes.append({name: "int"})
+        self.loop_depth += 1
+        self.scope(rnd.randint(1, 3), returns)
+        self.loop_depth -= 1
+        self.scopes.pop()
+        self.emit("}")
+
+    def function(self):
+        """Generates a function that reads its parameters and may assign ``acc``."""
+        rnd = self.random
+        name = self.name("f")
+        params = [rnd.choice(("int", "float", "str")) for _ in range(rnd.randint(0, 3))]
+        ret = rnd.choice(("int", "float", "str", "bool"))
+        names = [self.name("p") for _ in params]
+        self.emit(f"func {name}({', '.join(names)}) {{")
+        scopes, self.scopes = self.scopes, [{"acc": "int"}, dict(zip(names, params))]
+        # Functions may be called from hot loops, so their own loops stay short.
+        self.loop_depth += 1
+        self.scope(rnd.randint(1, 4), ret)
+        self.loop_depth -= 1
+        self.emit(f"    return {self.expr(ret)};")
+        self.emit("}")
+        self.scopes = scopes
+        self.functions[name] = (params, ret)
+
+    def generator_function(self):
+        """Generates a producer yielding ints, and sometimes a stage transforming them."""
+        rnd = self.random
+        name = self.name("g")
+        self.emit(f"func {name}(n) {{")
+        self.emit("    for (k in 1..n) {")
+        self.emit(f"        if (k > {rnd.randint(0, 3)}) {{")
+        self.emit(f"            yield k * {rnd.randint(1, 3)};")
+        self.emit("        }")
+        self.emit("    }")
+        self.emit("}")
+        self.producers.append(name)
+        if rnd.random() < 0.6:
+            name = self.name("s")
+            self.emit(f"func {name}(source) {{")
+            self.emit("    for (x in source) {")
+            self.emit("        acc = acc + 1;")
+            self.emit(f"        yield x + {rnd.randint(-2, 5)};")
+            self.emit("    }")
+            self.emit("}")
+            self.stages.append(name)
+
+    def failure(self):
+        """Generates a statement that raises an error, after some output."""
+        rnd = self.random
+        self.emit(rnd.choice((f"print({self.atom('int')} / 0);", "undefined(1);")))
+
+
+class Timeout(BaseException):
+    """
+    Raised in a run that outlasts its time limit; a BaseException, so that the
+    interpreter's own error handling does not catch it.
+    """
+
+
+def _expire(_signum, _frame):
+    raise Timeout()
+
+
+def execute(path, options, timeout):
+    """
+    Runs a program like the command line does, capturing everything it writes.
+
+    :param path: The path of the program.
+    :param options: The run_file arguments; callables are called to get the value.
+    :param timeout: The time limit of the run, in seconds.
+    :return: The output (stdout, stderr and the error raised, if any), or None if
+             the run timed out, and the time taken, in seconds.
+    """
+    kwargs = {k: v() if callable(v) else v for k, v in options.items()}
+    # Imported modules would otherwise only run, and print, in the first engine.
+    MODULES.clear()
+    out = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(STDIN)
+    signal.signal(signal.SIGALRM, _expire)
+    start = time.perf_counter()
+    try:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            run_file(path, **kwargs)
+    except Timeout:
+        out = None
+    except Exception as e:  # pylint: disable=W0718
+        out.write(f"error: {type(e).__name__}: {e}\n")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        sys.stdin = stdin
+    elapsed = time.perf_counter() - start
+    return (None if out is None else out.getvalue()), elapsed
+
+
+def check(path, times, timeout):
+    """
+    Runs a program with every engine and compares their outputs to the reference.
+
+    The times of a program are only added up if no engine timed out, so that every
+    engine's total covers the same programs. When the reference times out, the
+    other engines are not run.
+
+    :param path: The path of the program.
+    :param times: A dict adding up the time of every engine.
+    :param timeout: The time limit of each run, in seconds.
+    :return: A list of ``(engine name, diff)`` pairs, one per diverging engine, and
+             the names of the engines that timed out.
+    """
+    divergences = []
+    timed_out = []
+    elapsed = {}
+    expected = None
+    for name, options in ENGINES:
+        output, elapsed[name] = execute(path, options, timeout)
+        if output is None:
+            timed_out.append(name)
+            if expected is None:
+                break
+        elif expected is None:
+            expected = output
+        elif output != expected:
+            diff = difflib.unified_diff(
+                expected.splitlines(True), output.splitlines(True), "reference", name
+            )
+            divergences.append((name, "".join(diff)))
+    if not timed_out:
+        for name, seconds in elapsed.items():
+            times[name] = times.get(name, 0.0) + seconds
+    return divergences, timed_out
+
+
+def report(path, divergences, timed_out, timeout):
+    """Prints the diffs and timeouts of a failing program and keeps a copy of it."""
+    os.makedirs(FAILURES_DIR, exist_ok=True)
+    kept = os.path.join(FAILURES_DIR, os.path.basename(path))
+    shutil.copyfile(path, kept)
+    if timed_out:
+        names = ", ".join(timed_out)
+        print(f"TIMEOUT after {timeout:g} s in {path} (kept as {kept}): {names}")
+    if divergences:
+        print(f"DIVERGENCE in {path} (kept as {kept}):")
+    for name, diff in divergences:
+        print(f"--- {name}\n{diff}")
+
+
+def write_programs(directory, count, seed):
+    """
+    Writes random programs to files.
+
+    :param directory: The directory to write them to.
+    :param count: The number of programs.
+    :param seed: The seed of the first program; each program has its own generator.
+    :return: The paths of the files.
+    """
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"random_{seed}_{index}.mylang")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(ProgramGenerator(f"{seed}:{index}").program())
+        paths.append(path)
+    return paths
+
+
+def print_times(times):
+    """Prints the total time of every engine, relative to the reference."""
+    base = times.get(ENGINES[0][0], 0.0)
+    for name, _options in ENGINES:
+        seconds = times.get(name, 0.0)
+        ratio = base / seconds if seconds else 0.0
+        print(f"{name:20} {seconds * 1000:9.1f} ms  ({ratio:4.2f}x)")
+
+
+def main():
+    """Runs the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    timeout = float(sys.argv[3]) if len(sys.argv) > 3 else 30.0
+    programs = sorted(glob.glob(os.path.join(TEST_DIR, "*.mylang")))
+    print(f"{len(programs)} hand-written and {count} random programs")
+    times = {}
+    diverged = slow = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        programs += write_programs(tmp, count, seed)
+        for path in programs:
+            divergences, timed_out = check(path, times, timeout)
+            if divergences or timed_out:
+                diverged += bool(divergences)
+                slow += bool(timed_out)
+                report(path, divergences, timed_out, timeout)
+
+    print_times(times)
+    print(f"{diverged} program(s) diverged, {slow} timed out")
+    sys.exit(1 if diverged or slow else 0)
+
+
+if __name__ == "__main__":
+    main()
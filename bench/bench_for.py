@@ -0,0 +1,94 @@
+"""For-loop benchmark: ``for (i in a..b)`` against the equivalent ``while`` loop.
+
+Usage::
+
+    python bench/bench_for.py [N]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.metrics import ENVIRONMENTS
+from common.optimizer import optimize
+from common.tiering import Tier
+
+
+def while_program(n):
+    """
+    Generates a counted ``while`` loop summing a simple expression.
+
+    :param n: The trip count.
+    :return: The program source.
+    """
+    return (
+        "var total = 0;\n"
+        "var i = 0;\n"
+        f"while (i < {n}) {{\n"
+        "    total = total + i * 2;\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def for_program(n):
+    """
+    Generates the ``for`` loop equivalent to :func:`while_program`.
+
+    :param n: The trip count.
+    :return: The program source.
+    """
+    return (
+        "var total = 0;\n"
+        f"for (i in 0..{n - 1}) {{\n"
+        "    total = total + i * 2;\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def run(source, optimized, tier):
+    """Parses and runs a program, returning its output and the scopes it allocated."""
+    tree = parse(source)
+    if optimized:
+        tree = optimize(tree)
+    out = io.StringIO()
+    ENVIRONMENTS.reset()
+    with contextlib.redirect_stdout(out):
+        Interpreter(tier=tier).visit(tree)
+    return out.getvalue(), ENVIRONMENTS.allocated
+
+
+def main():
+    """Runs the benchmark."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    configurations = [
+        ("while", while_program(n), False, None),
+        ("while -O", while_program(n), True, None),
+        ("for", for_program(n), False, None),
+        ("while, tiered", while_program(n), False, Tier()),
+        ("for, tiered", for_program(n), False, Tier()),
+    ]
+    expected = run(while_program(n), False, None)[0]
+    print(f"{n} iterations")
+    base = None
+    for name, source, optimized, tier in configurations:
+        output, scopes = run(source, optimized, tier)
+        assert output == expected, f"{name}: outputs differ"
+        # Tiers keep compiled code on the nodes, so every run parses afresh.
+        elapsed = best_of(lambda: run(source, optimized, tier))  # pylint: disable=W0640
+        base = base or elapsed
+        print(
+            f"{name:14} {n / elapsed / 1e3:7.1f} k iter/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.1f}x),"
+            f" {scopes} scopes allocated"
+        )
+
+
+if __name__ == "__main__":
+    main()
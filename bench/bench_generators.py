@@ -0,0 +1,120 @@
+"""Generator benchmark: a producer, filter, map and consumer pipeline of generators.
+
+The pipeline is timed against the same work fused into a single ``for`` loop, and
+its peak memory is measured for growing sizes: every stage holds one value at a
+time, so the peak stays flat however many elements flow through.
+
+Usage::
+
+    python bench/bench_generators.py [N]
+
+The full-size run is ``python bench/bench_generators.py 10000000``.
+"""
+
+import contextlib
+import io
+import sys
+import tracemalloc
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.metrics import ENVIRONMENTS
+from common.tiering import Tier
+
+
+def pipeline_program(n):
+    """
+    Generates a pipeline of generator functions summed by a consumer loop.
+
+    :param n: The number of elements the producer yields.
+    :return: The program source.
+    """
+    return (
+        "func numbers(n) {\n"
+        "    for (i in 1..n) { yield i; }\n"
+        "}\n"
+        "func above(source, limit) {\n"
+        "    for (x in source) {\n"
+        "        if (x > limit) { yield x; }\n"
+        "    }\n"
+        "}\n"
+        "func doubled(source) {\n"
+        "    for (x in source) { yield x * 2; }\n"
+        "}\n"
+        "var total = 0;\n"
+        f"for (v in doubled(above(numbers({n}), 10))) {{\n"
+        "    total = total + v;\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def fused_program(n):
+    """
+    Generates the single loop equivalent to :func:`pipeline_program`.
+
+    :param n: The number of elements.
+    :return: The program source.
+    """
+    return (
+        "var total = 0;\n"
+        f"for (i in 1..{n}) {{\n"
+        "    if (i > 10) { total = total + i * 2; }\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def run(source):
+    """Parses and runs a program with the default tier, returning its output."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Interpreter(tier=Tier()).visit(parse(source))
+    return out.getvalue()
+
+
+def peak_memory(source):
+    """
+    Runs a program under :mod:`tracemalloc`.
+
+    :param source: The program source.
+    :return: The peak memory allocated while running it, in bytes, and the
+             number of scopes allocated.
+    """
+    ENVIRONMENTS.reset()
+    tracemalloc.start()
+    try:
+        run(source)
+        return tracemalloc.get_traced_memory()[1], ENVIRONMENTS.allocated
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    """Runs the benchmark."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    expected = sum(i * 2 for i in range(11, n + 1))
+    print(f"{n} elements, 4 stages")
+    base = None
+    for name, source in (
+        ("fused loop", fused_program(n)),
+        ("pipeline", pipeline_program(n)),
+    ):
+        assert run(source) == f"{expected}\n", f"{name}: wrong total"
+        repeat = 1 if n > 10**6 else 3
+        elapsed = best_of(lambda: run(source), repeat)  # pylint: disable=W0640
+        base = base or elapsed
+        print(
+            f"{name:11} {n / elapsed / 1e3:7.1f} k elements/s"
+            f"  ({elapsed * 1000:9.1f} ms, {base / elapsed:4.2f}x)"
+        )
+    print("pipeline peak memory:")
+    for size in (n // 100, n // 10, n):
+        peak, scopes = peak_memory(pipeline_program(size))
+        print(f"  {size:>10} elements {peak / 1024:8.1f} KiB, {scopes} scopes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Tokens-per-second benchmark: PLY lexer vs. the fast lexer.
+
+Usage::
+
+    python bench/bench_lexer.py [N_FUNCS]
+"""
+
+import os
+import sys
+import tempfile
+
+from support import best_of, generate_program  # isort: skip
+
+from common.fastlexer import FastLexer, load_source
+from common.lexer import build_lexer
+
+
+def ply_tokens(source):
+    """Tokenizes ``source`` with the PLY lexer."""
+    lex_obj = build_lexer(source)
+    return list(iter(lex_obj.token, None))
+
+
+def fast_tokens(source):
+    """Tokenizes ``source`` with the fast lexer."""
+    return list(FastLexer(source))
+
+
+def main():
+    """Runs the benchmark."""
+    n_funcs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    source = generate_program(n_funcs)
+
+    expected = [(t.type, t.value, t.lexpos) for t in ply_tokens(source)]
+    actual = [(t.type, t.value, t.lexpos) for t in fast_tokens(source)]
+    assert expected == actual, "fast lexer output differs from PLY"
+    count = len(expected)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".mylang", delete=False) as f:
+        f.write(source)
+    try:
+        results = [
+            ("ply", best_of(lambda: ply_tokens(source))),
+            ("fast (str)", best_of(lambda: fast_tokens(source))),
+            ("fast (mmap)", best_of(lambda: list(FastLexer(load_source(f.name))))),
+        ]
+    finally:
+        os.unlink(f.name)
+
+    print(f"{len(source) / 1e6:.1f} MB, {count} tokens")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(
+            f"{name:12} {count / elapsed / 1e6:6.2f} Mtok/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Loop benchmark: the tree-walking interpreter with and without ``-O``.
+
+Usage::
+
+    python bench/bench_loops.py [N]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.optimizer import optimize
+
+
+def loop_program(n):
+    """
+    Generates nested counted loops whose bodies read loop-invariant expressions.
+
+    :param n: The trip count of each loop.
+    :return: The program source.
+    """
+    return (
+        f"var n = {n};\n"
+        "var scale = 3;\n"
+        "var total = 0;\n"
+        "var i = 0;\n"
+        "while (i < n) {\n"
+        "    var j = 0;\n"
+        "    while (j < n) {\n"
+        "        total = total + i * (scale * 2 + 1) + j;\n"
+        "        j = j + 1;\n"
+        "    }\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "print(total);\n"
+    )
+
+
+def run(tree):
+    """Runs a program and returns its output."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Interpreter().visit(tree)
+    return out.getvalue()
+
+
+def main():
+    """Runs the benchmark."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    source = loop_program(n)
+    plain = parse(source)
+    optimized = optimize(parse(source))
+    assert run(plain) == run(optimized), "outputs differ"
+
+    results = [
+        ("interpreter", best_of(lambda: run(plain))),
+        ("interpreter -O", best_of(lambda: run(optimized))),
+    ]
+    print(f"{n * n} inner iterations")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(
+            f"{name:15} {n * n / elapsed / 1e3:7.1f} k iter/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Memoization benchmark: pure recursive functions with and without a result cache.
+
+Usage::
+
+    python bench/bench_memo.py [N]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.purity import Memo, mark_pure
+
+
+def recursive_program(n):
+    """
+    Generates a program calling two pure, exponentially recursive functions.
+
+    :param n: The argument of ``fib``, and the grid size of ``paths``.
+    :return: The program source.
+    """
+    return (
+        "func fib(n) {\n"
+        "    if (n < 2) { return n; }\n"
+        "    return fib(n - 1) + fib(n - 2);\n"
+        "}\n"
+        "func paths(r, c) {\n"
+        "    if (r == 0 or c == 0) { return 1; }\n"
+        "    return paths(r - 1, c) + paths(r, c - 1);\n"
+        "}\n"
+        f"print(fib({n}));\n"
+        f"print(paths({n // 2}, {n // 2}));\n"
+    )
+
+
+def run(tree, memo):
+    """Runs a program and returns its output."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Interpreter(memo=memo).visit(tree)
+    return out.getvalue()
+
+
+def main():
+    """Runs the benchmark."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 18
+    tree = parse(recursive_program(n))
+    assert mark_pure(tree) == ["fib", "paths"], "functions not detected as pure"
+    expected = run(tree, None)
+    memo = Memo()
+    assert run(tree, memo) == expected, "outputs differ"
+    calls = memo.misses + memo.hits
+
+    # A fresh Memo per run, so every memoized run starts with an empty cache.
+    results = [
+        ("plain", best_of(lambda: run(tree, None), repeat=1)),
+        ("memoized", best_of(lambda: run(tree, Memo()))),
+    ]
+    print(f"fib({n}) and paths({n // 2}, {n // 2}): {memo.misses} distinct calls")
+    print(f"memoized run: {calls} calls, {memo.hits} answered from the cache")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(f"{name:9} {elapsed * 1000:9.1f} ms  ({base / elapsed:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Parse-throughput benchmark: yacc parser vs. the Pratt parser.
+
+Usage::
+
+    python bench/bench_parser.py [N_FUNCS]
+"""
+
+import sys
+
+from support import best_of, generate_program  # isort: skip
+
+from common.fastlexer import FastLexer
+from common.frontend import parse
+
+
+def dump(node):
+    """Returns a comparable nested-tuple form of an AST."""
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if hasattr(node, "__dict__"):
+        return (type(node).__name__,) + tuple(
+            (key, dump(value)) for key, value in vars(node).items()
+        )
+    return node
+
+
+def main():
+    """Runs the benchmark."""
+    n_funcs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = generate_program(n_funcs)
+
+    expected = dump(parse(source))
+    assert dump(parse(source, backend="pratt")) == expected, "ASTs differ"
+
+    results = [
+        ("yacc", best_of(lambda: parse(source))),
+        ("yacc + fast lexer", best_of(lambda: parse(source, lexer=FastLexer()))),
+        ("pratt", best_of(lambda: parse(source, backend="pratt"))),
+    ]
+
+    print(f"{len(source) / 1e6:.1f} MB, {n_funcs} functions")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(
+            f"{name:18} {len(source) / elapsed / 1e6:5.2f} MB/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
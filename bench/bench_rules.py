@@ -0,0 +1,99 @@
+"""Rules-engine benchmark: re-running a program per record vs. the RuleEngine.
+
+Usage::
+
+    python bench/bench_rules.py [N_RECORDS] [N_SHARDS]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.rules import RuleEngine, process
+from common.tiering import Tier
+
+RULE = (
+    "func band(value) {\n"
+    "    if (value > 1000) { return 3; }\n"
+    "    if (value > 100) { return 2; }\n"
+    "    return 1;\n"
+    "}\n"
+    "func fee(value, country) {\n"
+    '    if (country == "BR") { return value / 10 * band(value); }\n'
+    "    return value / 20;\n"
+    "}\n"
+    "var due = fee(value, country);\n"
+    "if (due > 50) {\n"
+    '    print(name + " owes " + due);\n'
+    "}\n"
+)
+
+
+def make_records(n_records):
+    """
+    Generates records for :data:`RULE`.
+
+    :param n_records: The number of records.
+    :return: A list of dicts.
+    """
+    countries = ("BR", "PT", "AO")
+    return [
+        {"name": f"c{i}", "value": (i * 7919) % 3000, "country": countries[i % 3]}
+        for i in range(n_records)
+    ]
+
+
+def rerun(records):
+    """Runs the rule the old way: a new Interpreter and global scope per record."""
+    tree = parse(RULE)
+    outputs = []
+    for fields in records:
+        out = io.StringIO()
+        interp = Interpreter()
+        interp.global_env.vars.update(fields)
+        with contextlib.redirect_stdout(out):
+            interp.visit(tree)
+        outputs.append(out.getvalue())
+    return outputs
+
+
+def engine(records):
+    """Runs the rule with a RuleEngine in this process."""
+    rules = RuleEngine(parse(RULE), tier=Tier())
+    return [rules.run(fields)["output"] for fields in records]
+
+
+def sharded(records, shards):
+    """Runs the rule sharded over worker processes."""
+    return [r["output"] for r in process(RULE, records, tier=Tier(), shards=shards)]
+
+
+def main():
+    """Runs the benchmark."""
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    records = make_records(n_records)
+    expected = rerun(records)
+    assert engine(records) == expected, "outputs differ"
+    assert sharded(records, shards) == expected, "outputs differ"
+
+    results = [
+        ("re-run per record", best_of(lambda: rerun(records))),
+        ("rule engine", best_of(lambda: engine(records))),
+        (f"{shards} shards", best_of(lambda: sharded(records, shards))),
+    ]
+    print(f"{n_records} records")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(
+            f"{name:18} {n_records / elapsed:9.0f} records/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Snapshot benchmark: re-running a setup phase vs. restoring its snapshot.
+
+Usage::
+
+    python bench/bench_snapshot.py [N_FUNCS]
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+from support import best_of, generate_program  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.snapshot import load_snapshot, save_snapshot
+
+
+def setup_program(n_funcs):
+    """
+    Generates a setup phase: function definitions plus computed lookup values.
+
+    :param n_funcs: The number of functions and lookup values.
+    :return: The program source.
+    """
+    funcs = generate_program(n_funcs).replace("print(", "label(")
+    # Drop the generated top-level calls; only the definitions are setup.
+    definitions = "\n".join(
+        line for line in funcs.splitlines() if not re.match(r"f\d+\(", line)
+    )
+    tables = "".join(
+        f"var t{k} = 0;\nvar j = 0;\n"
+        f"while (j < 50) {{ t{k} = t{k} + j * {k}; j = j + 1; }}\n"
+        for k in range(n_funcs)
+    )
+    return "func label(s) { }\n" + definitions + "\n" + tables
+
+
+def main():
+    """Runs the benchmark."""
+    n_funcs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    source = setup_program(n_funcs)
+
+    def run_setup():
+        interp = Interpreter()
+        interp.visit(parse(source))
+        return interp
+
+    def restore():
+        interp = Interpreter()
+        load_snapshot(interp, path)
+        return interp
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "setup.snap")
+        expected = run_setup()
+        save_snapshot(expected, path)
+        restored = restore()
+        assert restored.global_env.vars == expected.global_env.vars, "vars differ"
+        assert set(restored.global_env.funcs) == set(expected.global_env.funcs)
+
+        setup = best_of(run_setup)
+        load = best_of(restore)
+        size = os.path.getsize(path)
+
+    print(f"{n_funcs} functions, {len(expected.global_env.vars)} variables")
+    print(f"parse + run setup  {setup * 1000:8.1f} ms")
+    print(
+        f"load snapshot      {load * 1000:8.1f} ms  ({setup / load:5.1f}x,"
+        f" {size / 1024:.0f} KiB file)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Parallelism benchmark: sequential calls vs. spawn/join on worker processes.
+
+Usage::
+
+    python bench/bench_spawn.py [N_TASKS] [N_ITERATIONS]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.parallel import WorkerPool
+from common.tiering import Tier
+from main import run_file
+
+_WORK = (
+    "func work(seed, n) {\n"
+    "    var acc = seed;\n"
+    "    var i = 0;\n"
+    "    while (i < n) {\n"
+    "        acc = acc * 31 + i;\n"
+    "        acc = acc - (acc / 1000003) * 1000003;\n"
+    "        i = i + 1;\n"
+    "    }\n"
+    "    return acc;\n"
+    "}\n"
+)
+
+
+def sequential_program(n_tasks, n_iterations):
+    """
+    Generates a program making independent, CPU-bound calls one after another.
+
+    :param n_tasks: The number of calls.
+    :param n_iterations: The loop iterations of each call.
+    :return: The program source.
+    """
+    calls = "".join(
+        f"print(work({seed}, {n_iterations}));\n" for seed in range(n_tasks)
+    )
+    return _WORK + calls
+
+
+def parallel_program(n_tasks, n_iterations):
+    """
+    Generates the same program, spawning every call before joining them in order.
+
+    :param n_tasks: The number of calls.
+    :param n_iterations: The loop iterations of each call.
+    :return: The program source.
+    """
+    spawns = "".join(
+        f"var h{seed} = spawn work({seed}, {n_iterations});\n"
+        for seed in range(n_tasks)
+    )
+    joins = "".join(f"print(join(h{seed}));\n" for seed in range(n_tasks))
+    return _WORK + spawns + joins
+
+
+def run(source, workers):
+    """Runs a program, on a fresh WorkerPool if ``workers`` is set, and returns its output."""
+    out = io.StringIO()
+    tree = parse(source)
+    pool = WorkerPool(source, workers=workers, tier=Tier()) if workers else None
+    try:
+        with contextlib.redirect_stdout(out):
+            Interpreter(tier=Tier(), pool=pool).visit(tree)
+    finally:
+        if pool is not None:
+            pool.close()
+    return out.getvalue()
+
+
+def check_snapshot():
+    """Checks that spawned calls see the functions restored from a snapshot."""
+    with tempfile.TemporaryDirectory() as tmp:
+        setup = os.path.join(tmp, "setup.mylang")
+        work = os.path.join(tmp, "work.mylang")
+        snapshot = os.path.join(tmp, "setup.snap")
+        with open(setup, "w", encoding="utf-8") as f:
+            f.write(_WORK)
+        with open(work, "w", encoding="utf-8") as f:
+            f.write("var h = spawn work(1, 10);\nprint(join(h) == work(1, 10));\n")
+        run_file(setup, save_to=snapshot)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_file(work, snapshot=snapshot, workers=1)
+    assert out.getvalue() == "True\n", "snapshot functions not seen by workers"
+
+
+def main():
+    """Runs the benchmark."""
+    check_snapshot()
+    n_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n_iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    sequential = sequential_program(n_tasks, n_iterations)
+    parallel = parallel_program(n_tasks, n_iterations)
+    expected = run(sequential, None)
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cpus})
+    for workers in counts:
+        assert run(parallel, workers) == expected, "outputs differ"
+
+    # Every pooled run starts its worker processes afresh, so the timings
+    # include process start-up and each worker parsing the program.
+    results = [("sequential", best_of(lambda: run(sequential, None)))]
+    for workers in counts:
+        results.append(
+            (f"{workers} workers", best_of(lambda w=workers: run(parallel, w)))
+        )
+    print(f"{n_tasks} calls of {n_iterations} iterations, {cpus} CPUs")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(f"{name:11} {elapsed * 1000:8.1f} ms  ({base / elapsed:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
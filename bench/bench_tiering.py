@@ -0,0 +1,79 @@
+"""Tiering benchmark: tree-walking vs. compiling hot functions and loops.
+
+Usage::
+
+    python bench/bench_tiering.py [N_CALLS]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.interpreter import Interpreter
+from common.tiering import Tier
+
+
+def hot_program(n_calls):
+    """
+    Generates a program that spends its time in one small, hot function.
+
+    :param n_calls: How many times the function is called.
+    :return: The program source.
+    """
+    return (
+        "var total = 0;\n"
+        'var label = "";\n'
+        "func step(i, scale) {\n"
+        "    var half = i / 2;\n"
+        "    if (i - half * 2 == 0 and i > 0) {\n"
+        "        total = total + i * scale;\n"
+        "    } else {\n"
+        "        total = total - 1;\n"
+        "    }\n"
+        '    label = "step " + i;\n'
+        "}\n"
+        "var i = 0;\n"
+        f"while (i < {n_calls}) {{\n"
+        "    step(i, 3);\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "print(total);\n"
+        "print(label);\n"
+    )
+
+
+def run(tree, tier):
+    """Runs a program and returns its output."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Interpreter(tier=tier).visit(tree)
+    return out.getvalue()
+
+
+def main():
+    """Runs the benchmark."""
+    n_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    source = hot_program(n_calls)
+    # Each run parses afresh, so every tiered run starts cold and pays for
+    # counting, translation and compilation.
+    expected = run(parse(source), None)
+    assert run(parse(source), Tier()) == expected, "outputs differ"
+
+    results = [
+        ("tree-walking", best_of(lambda: run(parse(source), None))),
+        ("tiered", best_of(lambda: run(parse(source), Tier()))),
+    ]
+    print(f"{n_calls} calls")
+    base = results[0][1]
+    for name, elapsed in results:
+        print(
+            f"{name:13} {n_calls / elapsed / 1e3:7.1f} k calls/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Type inference benchmark: arithmetic with and without the numeric fast paths.
+
+Usage::
+
+    python bench/bench_types.py [N]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of  # isort: skip
+
+from common.frontend import parse
+from common.inference import infer_types
+from common.interpreter import Interpreter
+from common.tiering import Tier
+
+
+def arithmetic_program(n):
+    """
+    Generates a loop doing integer and float arithmetic on local variables.
+
+    :param n: The number of iterations.
+    :return: The program source.
+    """
+    return (
+        "var total = 0;\n"
+        "var mean = 0.0;\n"
+        "var i = 0;\n"
+        f"while (i < {n}) {{\n"
+        "    var d = i - 3;\n"
+        "    total = total + d - i + 2;\n"
+        "    mean = mean + d - 1.5;\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "print(total);\n"
+        "print(mean);\n"
+    )
+
+
+def run(tree, tier):
+    """Runs a program and returns its output."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Interpreter(tier=tier).visit(tree)
+    return out.getvalue()
+
+
+def measure(source, tier, expected):
+    """
+    Times a program without and with type inference.
+
+    :param source: The program source.
+    :param tier: The Tier to run with, or None to only tree-walk.
+    :param expected: The program's output.
+    :return: A list of ``(name, seconds)`` pairs.
+    """
+    # One tree per configuration, so compiled code is only reused by itself.
+    plain = parse(source)
+    typed = parse(source)
+    infer_types(typed)
+    assert run(plain, tier) == run(typed, tier) == expected, "outputs differ"
+    mode = "tree-walk" if tier is None else "tiered"
+    return [
+        (mode, best_of(lambda: run(plain, tier))),
+        (f"{mode} + types", best_of(lambda: run(typed, tier))),
+    ]
+
+
+def main():
+    """Runs the benchmark."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    source = arithmetic_program(n)
+    inferred = parse(source)
+    inference = infer_types(inferred)
+    assert inference.numeric == inference.operations, "arithmetic not proven numeric"
+    expected = run(parse(source), None)
+
+    results = []
+    for tier in (None, Tier()):
+        results.extend(measure(source, tier, expected))
+    print(f"{n} iterations, {inference.operations} additions and subtractions")
+    for index, (name, elapsed) in enumerate(results):
+        base = results[index - index % 2][1]
+        print(
+            f"{name:17} {n / elapsed / 1e3:7.1f} k iter/s"
+            f"  ({elapsed * 1000:7.1f} ms, {base / elapsed:4.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
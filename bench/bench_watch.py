@@ -0,0 +1,94 @@
+"""Watch-mode benchmark: full re-parse vs. incremental re-parse after an edit.
+
+Before timing, :func:`check_reruns` checks that a re-run after an edit prints what
+a fresh run of the edited file prints, although the unchanged statements keep
+their compiled code.
+
+Usage::
+
+    python bench/bench_watch.py [N_FUNCS]
+"""
+
+import contextlib
+import io
+import sys
+
+from support import best_of, generate_program  # isort: skip
+
+from bench_parser import dump
+from common.frontend import parse
+from common.inference import infer_types
+from common.interpreter import Interpreter
+from common.tiering import Tier
+from common.watch import IncrementalParser
+from main import watch_executor
+
+# Editing the callee g changes the type of f's x, which f's compiled code assumed.
+CALLER = (
+    "var y = 0;\n"
+    "func g() { y = 1; }\n"
+    "func f() { var x = 0; g(); print(x + 1); }\n"
+    "f();\n"
+    "f();\n"
+)
+EDITED = CALLER.replace("y = 1;", 'x = "a";')
+
+
+def output(execute, tree):
+    """Runs a parsed program, returning what it prints."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        execute(tree)
+    return out.getvalue()
+
+
+def check_reruns():
+    """Checks that a watch re-run after editing a callee matches a fresh run."""
+    incremental = IncrementalParser(optimized=True)
+    execute = watch_executor("edited.mylang", optimized=True, tier=Tier(1))
+    output(execute, incremental.parse(CALLER))
+    rerun = output(execute, incremental.parse(EDITED))
+    assert incremental.reparsed == 1, "only g should be re-parsed"
+
+    def fresh(tree):
+        infer_types(tree)
+        Interpreter(tier=Tier(1)).visit(tree)
+
+    expected = output(fresh, IncrementalParser(optimized=True).parse(EDITED))
+    assert rerun == expected == "a1\na1\n", f"re-run printed {rerun!r}"
+
+
+def main():
+    """Runs the benchmark."""
+    check_reruns()
+    n_funcs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = generate_program(n_funcs)
+    # Each edit changes the body of one function in the middle of the program.
+    marker = f"x{n_funcs // 2} = -x{n_funcs // 2};"
+    edits = [
+        source.replace(marker, f"x{n_funcs // 2} = {k} - x{n_funcs // 2};")
+        for k in range(4)
+    ]
+
+    incremental = IncrementalParser()
+    incremental.parse(source)
+    assert dump(incremental.parse(edits[0])) == dump(parse(edits[0])), "ASTs differ"
+
+    def reparse():
+        for edit in edits:
+            incremental.parse(edit)
+
+    full = best_of(lambda: [parse(edit) for edit in edits]) / len(edits)
+    partial = best_of(reparse) / len(edits)
+    print(
+        f"{len(source) / 1e6:.1f} MB, {n_funcs} functions, {incremental.total} statements"
+    )
+    print(f"full re-parse         {full * 1000:7.1f} ms")
+    print(
+        f"incremental re-parse  {partial * 1000:7.1f} ms"
+        f"  ({incremental.reparsed} statement, {full / partial:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
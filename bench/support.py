@@ -0,0 +1,61 @@
+"""Shared helpers for the My-Lang benchmarks.
+
+Benchmarks are run from the repository root, e.g.::
+
+    python bench/bench_lexer.py
+"""
+
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def generate_program(n_funcs):
+    """
+    Generates a large, syntactically valid My-Lang program.
+
+    Every generated function exercises declarations, assignments, arithmetic,
+    comparisons, logical operators, strings, comments, if/else and while.
+
+    :param n_funcs: The number of function blocks to generate.
+    :return: The program source.
+    """
+    parts = []
+    for i in range(n_funcs):
+        parts.append(
+            f"// block {i}\n"
+            f"func f{i}(a, b) {{\n"
+            f"    var x{i} = a * {i} + b / 2.5 - (a - {i});\n"
+            f'    var s{i} = "item " + x{i};\n'
+            f"    if (x{i} >= {i} and not (b == 0) or a != b) {{\n"
+            f"        print(s{i});\n"
+            f"    }} else {{\n"
+            f"        x{i} = -x{i};\n"
+            f"    }}\n"
+            f"    while (x{i} < {i} * 3) {{\n"
+            f"        x{i} = x{i} + 1;\n"
+            f"    }}\n"
+            f"}}\n"
+            f"f{i}({i}, {i} + 1);\n"
+        )
+    return "".join(parts)
+
+
+def best_of(fn, repeat=3):
+    """
+    Runs ``fn`` several times and returns the fastest wall-clock time.
+
+    :param fn: A callable taking no arguments.
+    :param repeat: How many times to run it.
+    :return: The best time in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
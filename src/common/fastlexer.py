@@ -0,0 +1,248 @@
+"""Fast table-driven lexer for the MyLang language.
+
+Drop-in replacement for the PLY lexer in :mod:`common.lexer`: it emits the same
+token types and values, but scans the whole buffer with a single compiled
+master regex instead of one Python callback per token. Line numbers are not
+tracked while scanning; they are computed lazily from the token position, so
+the common (error-free) path never pays for them.
+"""
+
+import mmap
+import re
+from bisect import bisect_right
+from functools import partial
+
+from .lexer import reserved
+
+# The rules of common.lexer folded into one pattern. Ignored text (blanks,
+# newlines and comments) is consumed as a prefix of every match, so each
+# match yields exactly one token; the group that matched gives its kind.
+# Operators list their two-character forms first, as PLY sorts string rules
+# by decreasing regex length.
+_SKIP = r"(?:[ \t\n]+|//[^\n]*)*"
+_GROUPS = (
+    r"([A-Za-z_][A-Za-z0-9_]*)",  # 1: IDENTIFIER and reserved words
+    r"(\d+(?:\.\d+)?)",  # 2: NUMBER
+    r"(==|!=|<=|>=|\.\.|[-+*/<>=(){},;])",  # 3: operators and punctuation
+    r'("(?:[^\\"]|\\.)*")',  # 4: STRING
+    r"(\Z)",  # 5: end of input
+)
+_IDENTIFIER, _NUMBER, _OPERATOR, _STRING, _END, _ERROR = range(1, 7)
+
+_OPERATORS = {
+    "==": "EQEQ",
+    "!=": "NEQ",
+    "<=": "LE",
+    ">=": "GE",
+    "..": "DOTDOT",
+    "+": "PLUS",
+    "-": "MINUS",
+    "*": "MUL",
+    "/": "DIV",
+    "<": "LT",
+    ">": "GT",
+    "=": "EQ",
+    "(": "LPAREN",
+    ")": "RPAREN",
+    "{": "LBRACE",
+    "}": "RBRACE",
+    ",": "COMMA",
+    ";": "SEMI",
+}
+# Bytes-mode lookup: operator bytes -> (type, str value).
+_OPERATORS_BYTES = {op.encode("ascii"): (type_, op) for op, type_ in _OPERATORS.items()}
+
+_MASTER_STR = re.compile(_SKIP + "(?:" + "|".join(_GROUPS) + r"|(.))")
+# In bytes mode an unexpected character may span several UTF-8 bytes.
+_MASTER_BYTES = re.compile(
+    (_SKIP + "(?:" + "|".join(_GROUPS) + r"|([\xc0-\xff][\x80-\xbf]*|.))").encode(
+        "ascii"
+    )
+)
+_NEWLINE_STR = re.compile("\n")
+_NEWLINE_BYTES = re.compile(b"\n")
+
+
+class Token:
+    """A lexical token, compatible with the tokens produced by PLY."""
+
+    __slots__ = ("type", "value", "lexpos", "lexer", "_lineno")
+
+    def __init__(self, type_, value, lexpos, lexer):
+        """
+        Initializes a new Token.
+
+        :param type_: The token type, e.g. ``NUMBER`` or ``IDENTIFIER``.
+        :param value: The token value.
+        :param lexpos: The offset of the token in the lexer input.
+        :param lexer: The FastLexer that produced the token.
+        """
+        self.type = type_
+        self.value = value
+        self.lexpos = lexpos
+        self.lexer = lexer
+        self._lineno = None
+
+    @property
+    def lineno(self):
+        """The line of the token, computed on first access."""
+        if self._lineno is None:
+            self._lineno = self.lexer.line_of(self.lexpos)
+        return self._lineno
+
+    @lineno.setter
+    def lineno(self, value):
+        self._lineno = value
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+
+def load_source(path):
+    """
+    Maps a source file into memory without reading it into a Python string.
+
+    :param path: The path of the file to load.
+    :return: A read-only mmap of the file, or ``b""`` for an empty file.
+    """
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return b""
+
+
+class FastLexer:
+    """Single-regex lexer with the same interface as a PLY lexer."""
+
+    def __init__(self, input_data=None):
+        """
+        Initializes a new FastLexer.
+
+        :param input_data: Optional source to scan, either a ``str`` or a
+                           bytes-like object such as the result of
+                           :func:`load_source`.
+        """
+        self.lexdata = ""
+        self.lexpos = 0
+        self.errors = []  # offsets of unexpected characters
+        self._tokens = iter(())
+        self._line_starts = None
+        if input_data is not None:
+            self.input(input_data)
+
+    def input(self, data):
+        """
+        Resets the lexer to scan the given source.
+
+        :param data: The source to scan, either a ``str`` or bytes-like object.
+        """
+        self.lexdata = data
+        self.lexpos = 0
+        self.errors = []
+        self._line_starts = None
+        self._tokens = self._scan(data)
+        # Bind the fast path directly; the parser calls token() once per token.
+        self.token = partial(next, self._tokens, None)
+
+    def token(self):  # pylint: disable=E0202
+        """
+        Returns the next token, or None at the end of the input.
+        """
+        return next(self._tokens, None)
+
+    def __iter__(self):
+        return self._tokens
+
+    @property
+    def lineno(self):
+        """The line of the current scan position."""
+        return self.line_of(self.lexpos)
+
+    def line_of(self, pos):
+        """
+        Returns the 1-based line number of an offset in the input.
+
+        The line index is built once, on the first call.
+
+        :param pos: The offset in the input.
+        :return: The line number containing the offset.
+        """
+        if self._line_starts is None:
+            newline = _NEWLINE_STR if isinstance(self.lexdata, str) else _NEWLINE_BYTES
+            self._line_starts = [m.end() for m in newline.finditer(self.lexdata)]
+        return bisect_right(self._line_starts, pos) + 1
+
+    def _scan(self, data):
+        """Generates the tokens of ``data``."""
+        is_text = isinstance(data, str)
+        master = _MASTER_STR if is_text else _MASTER_BYTES
+        operators = _OPERATORS if is_text else _OPERATORS_BYTES
+        get_reserved = reserved.get
+        dot = "." if is_text else b"."
+        for m in master.finditer(data):
+            kind = m.lastindex
+            pos = m.start(kind)
+            if kind == _IDENTIFIER:
+                value = m.group(kind)
+                if not is_text:
+                    value = value.decode("ascii")
+                yield Token(get_reserved(value, "IDENTIFIER"), value, pos, self)
+            elif kind == _OPERATOR:
+                op = m.group(kind)
+                if is_text:
+                    yield Token(operators[op], op, pos, self)
+                else:
+                    type_, op = operators[op]
+                    yield Token(type_, op, pos, self)
+            elif kind == _NUMBER:
+                text = m.group(kind)
+                value = float(text) if dot in text else int(text)
+                yield Token("NUMBER", value, pos, self)
+            elif kind == _STRING:
+                value = data[pos + 1 : m.end() - 1]
+                if not is_text:
+                    value = value.decode("utf-8")
+                yield Token("STRING", value, pos, self)
+            elif kind == _END:
+                self.lexpos = pos
+                return
+            else:
+                self.lexpos = pos
+                self._error(pos)
+
+    def _error(self, pos):
+        """
+        Reports an unexpected character the same way as ``common.lexer.t_error``.
+
+        :param pos: The offset of the unexpected character.
+        """
+        self.errors.append(pos)
+        data = self.lexdata
+        is_text = isinstance(data, str)
+        newline = "\n" if is_text else b"\n"
+        start = data.rfind(newline, 0, pos) + 1
+        end = data.find(newline, pos)
+        if end < 0:
+            end = len(data)
+        err_line = data[start:end]
+        prefix = err_line[: pos - start]
+        if not is_text:
+            err_line = err_line.decode("utf-8", "replace")
+            prefix = prefix.decode("utf-8", "replace")
+        col = len(prefix) + 1
+        char = err_line[col - 1]
+        print(
+            f"Lexical error at line {self.line_of(pos)}, column {col}:"
+            f" unexpected character '{char}'"
+        )
+        print(err_line)
+        print(" " * (col - 1) + "^")
+
+
+def build_fast_lexer(input_data=None):
+    """
+    Build and return a FastLexer, optionally initialized with input_data.
+    """
+    return FastLexer(input_data)
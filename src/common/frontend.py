@@ -0,0 +1,48 @@
+"""Parser backend selection for the MyLang language."""
+
+from .fastlexer import FastLexer
+from .parser import parse as yacc_parse, syntax_errors
+from .pratt import PrattParser, parse as pratt_parse
+
+BACKENDS = ("yacc", "pratt")
+
+
+def parse(input_data, backend="yacc", **kwargs):
+    """
+    Parse the given input data using the selected parser backend.
+
+    :param input_data: The input data to be parsed.
+    :param backend: "yacc" for the generated LALR parser in :mod:`common.parser`, or
+                    "pratt" for the hand-written parser in :mod:`common.pratt`, which
+                    reports every syntax error in one pass.
+    :param kwargs: Additional keyword arguments to pass to the parser, e.g. ``lexer``.
+    :return: The result of parsing the input data.
+    :raises ValueError: If the backend is unknown.
+    """
+    if backend == "yacc":
+        return yacc_parse(input_data, **kwargs)
+    if backend == "pratt":
+        return pratt_parse(input_data, **kwargs)
+    raise ValueError(f"Unknown parser backend: {backend}")
+
+
+def parse_checked(input_data, backend="yacc"):
+    """
+    Parse the given input data with the fast lexer and count the errors reported.
+
+    :param input_data: The input data to be parsed.
+    :param backend: The parser backend, see :func:`parse`.
+    :return: A ``(tree, error_count)`` tuple; the input is valid if the count is 0.
+    :raises ValueError: If the backend is unknown.
+    """
+    lexer = FastLexer()
+    if backend == "yacc":
+        tree = yacc_parse(input_data, lexer=lexer)
+        errors = len(syntax_errors)
+    elif backend == "pratt":
+        parser = PrattParser(lexer)
+        tree = parser.parse(input_data)
+        errors = len(parser.errors)
+    else:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    return tree, errors + len(lexer.errors)
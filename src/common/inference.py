@@ -0,0 +1,404 @@
+"""Static type inference for MyLang programs.
+
+:func:`infer_types` follows the flow of a program and classifies every variable
+and expression as ``int``, ``float``, ``str``, ``bool`` or ``unknown``, with
+``number`` standing for an int or a float. The ``+`` and ``-`` operations whose
+operands are proven numeric are marked ``numeric``: the interpreter and compiled
+code (see :mod:`common.tiering`) then apply them directly, without the type checks
+and string coercions of the general operators.
+
+The analysis is conservative, because of dynamic scoping:
+
+* parameters, and variables a function reads without declaring them, are
+  unknown, since they belong to the caller;
+* a call may assign any variable that a function of the program assigns, so
+  those become unknown after a call; after a call to a function the program does
+  not declare, every variable is unknown;
+* an ``import`` in a nested scope may shadow the variables of the enclosing ones,
+  which become unknown;
+* the types after an ``if`` are those of both branches joined, and a loop is
+  analyzed until the types at its start stop changing.
+
+The operations whose operands have different types, and the variables assigned
+values of different types, are collected as the mixed-type sites of the report:
+they are the code that runs on the slow, coercing paths.
+"""
+
+from .nodes import (
+    AssignmentNode,
+    BinaryOpNode,
+    BlockNode,
+    CountedLoopNode,
+    ForEachNode,
+    ForNode,
+    FuncCallNode,
+    FuncDeclNode,
+    HoistedLoopNode,
+    HoistedNode,
+    IfNode,
+    ImportNode,
+    InputNode,
+    NumberNode,
+    SpawnNode,
+    StringNode,
+    UnaryOpNode,
+    VarAccessNode,
+    VarDeclNode,
+    WhileNode,
+    iter_child_nodes,
+    walk,
+)
+from .tiering import describe
+
+INT = "int"
+FLOAT = "float"
+NUMBER = "number"
+STR = "str"
+BOOL = "bool"
+UNKNOWN = "unknown"
+
+NUMERIC = frozenset((INT, FLOAT, NUMBER))
+# Operands that arithmetic treats as numbers (true + 1 is 2).
+_ARITHMETIC = NUMERIC | {BOOL}
+_BOOLEAN_OPS = frozenset(("==", "!=", "<", "<=", ">", ">=", "and", "or"))
+_FAST_OPS = frozenset(("+", "-"))
+_PROGRAM = "<program>"
+
+
+def join(first, second):
+    """
+    Returns the type of a value that may have either of two types.
+
+    :param first: A type.
+    :param second: Another type.
+    :return: The joined type.
+    """
+    if first == second:
+        return first
+    if first in NUMERIC and second in NUMERIC:
+        return NUMBER
+    return UNKNOWN
+
+
+def _kind(kind):
+    """Groups the numeric types together, for finding mixed types."""
+    return NUMBER if kind in NUMERIC else kind
+
+
+def _arithmetic(left, right):
+    """Returns the type of a number computed from two arithmetic operands."""
+    if left in _ARITHMETIC and right in _ARITHMETIC:
+        if FLOAT in (left, right):
+            return FLOAT
+        if left in (INT, BOOL) and right in (INT, BOOL):
+            return INT
+    return NUMBER
+
+
+def binary_type(op, left, right):
+    """
+    Returns the type of a binary operation, as the interpreter evaluates it.
+
+    :param op: The operator.
+    :param left: The type of the left operand.
+    :param right: The type of the right operand.
+    :return: The type of the result.
+    """
+    if op in _BOOLEAN_OPS:
+        return BOOL
+    if op == "/":
+        return FLOAT
+    if op == "-":
+        # Both operands are converted to numbers, or the operation fails.
+        return _arithmetic(left, right)
+    if left in _ARITHMETIC and right in _ARITHMETIC:
+        return _arithmetic(left, right)
+    return UNKNOWN  # "+" concatenates, "*" repeats strings
+
+
+def _copy(scopes):
+    """Copies the types of the variables of every scope."""
+    return [dict(scope) for scope in scopes]
+
+
+def _join_into(scopes, other):
+    """Joins the types of ``other`` into ``scopes``, scope by scope."""
+    for scope, types in zip(scopes, other):
+        for name, kind in scope.items():
+            scope[name] = join(kind, types.get(name, UNKNOWN))
+
+
+class Inference:
+    def __init__(self, operations, numeric, sites):
+        """
+        Initializes a new Inference, the result of :func:`infer_types`.
+
+        :param operations: The number of ``+`` and ``-`` operations in the program.
+        :param numeric: How many of them were proven numeric.
+        :param sites: The mixed-type sites, as descriptions.
+        """
+        self.operations = operations
+        self.numeric = numeric
+        self.sites = sites
+
+    def report(self):
+        """
+        Summarizes the inference.
+
+        :return: The report, one mixed-type site per line after the summary.
+        """
+        lines = [
+            f"Type inference: {self.numeric}/{self.operations} additions and"
+            f" subtractions proven numeric, {len(self.sites)} mixed-type site(s)"
+        ]
+        lines.extend(f"  {site}" for site in self.sites)
+        return "\n".join(lines)
+
+
+class _Analyzer:
+    """Follows the types of the variables through a program."""
+
+    def __init__(self, funcs):
+        """
+        Initializes a new _Analyzer.
+
+        :param funcs: Every FuncDeclNode a call of the program may run.
+        """
+        self.functions = {func.name for func in funcs}
+        self.clobbered = {
+            node.name
+            for func in funcs
+            for stmt in func.body
+            for node in walk(stmt)
+            if isinstance(node, AssignmentNode)
+        }
+        self.analyzed = set()
+        self.context = _PROGRAM
+        self.operands = {}  # BinaryOpNode -> (left type, right type, context)
+        self.assigned = {}  # (context, name) -> types of the values assigned
+
+    def record(self, name, kind):
+        """Records a value assigned to a variable, for the report."""
+        if kind != UNKNOWN:
+            self.assigned.setdefault((self.context, name), []).append(kind)
+
+    def visit(self, node, scopes):  # pylint: disable=R0911,R0912
+        """
+        Analyzes a node, updating the types of the variables it assigns.
+
+        :param node: The node.
+        :param scopes: The types of the variables, one dict per enclosing scope,
+                       innermost last.
+        :return: The type of the node's value.
+        """
+        if isinstance(node, NumberNode):
+            return FLOAT if isinstance(node.value, float) else INT
+        if isinstance(node, (StringNode, InputNode)):
+            return STR
+        if isinstance(node, VarAccessNode):
+            if node.name in ("true", "false"):
+                return BOOL
+            for scope in reversed(scopes):
+                if node.name in scope:
+                    return scope[node.name]
+            return UNKNOWN
+        if isinstance(node, BinaryOpNode):
+            left = self.visit(node.left, scopes)
+            right = self.visit(node.right, scopes)
+            seen = self.operands.get(node)
+            if seen is not None:
+                left, right = join(left, seen[0]), join(right, seen[1])
+            self.operands[node] = (left, right, self.context)
+            return binary_type(node.op, left, right)
+        if isinstance(node, UnaryOpNode):
+            operand = self.visit(node.operand, scopes)
+            if node.op == "not":
+                return BOOL
+            return _arithmetic(operand, INT)
+        if isinstance(node, FuncCallNode):
+            for arg in node.args:
+                self.visit(arg, scopes)
+            if node.name == "input":
+                return STR
+            if node.name != "print":
+                self.call(node.name, scopes)
+            return UNKNOWN
+        if isinstance(node, SpawnNode):
+            # The call runs elsewhere and cannot see these variables.
+            for arg in node.call.args:
+                self.visit(arg, scopes)
+            return UNKNOWN
+        if isinstance(node, HoistedNode):
+            return self.visit(node.expr, scopes)
+        self.statement(node, scopes)
+        return UNKNOWN
+
+    def statement(self, node, scopes):  # pylint: disable=R0912
+        """Analyzes a node that has no value of interest, see :meth:`visit`."""
+        if isinstance(node, VarDeclNode):
+            kind = self.visit(node.expr, scopes) if node.expr is not None else UNKNOWN
+            scopes[-1][node.name] = kind
+            self.record(node.name, kind)
+        elif isinstance(node, AssignmentNode):
+            kind = self.visit(node.expr, scopes)
+            self.record(node.name, kind)
+            for scope in reversed(scopes):
+                if node.name in scope:
+                    scope[node.name] = kind
+                    break
+        elif isinstance(node, BlockNode):
+            for stmt in node.statements:
+                self.visit(stmt, scopes)
+        elif isinstance(node, IfNode):
+            self.visit(node.cond, scopes)
+            other = _copy(scopes)
+            self.visit_scope(node.then_block, scopes)
+            if node.else_block:
+                self.visit_scope(node.else_block, other)
+            _join_into(scopes, other)
+        elif isinstance(node, WhileNode):
+            self.visit_loop(node, scopes)
+        elif isinstance(node, (ForNode, ForEachNode)):
+            self.visit_for(node, scopes)
+        elif isinstance(node, (HoistedLoopNode, CountedLoopNode)):
+            self.visit(node.loop, scopes)
+        elif isinstance(node, FuncDeclNode):
+            self.visit_function(node)
+        elif isinstance(node, ImportNode):
+            for scope in scopes[:-1]:
+                scope.update(dict.fromkeys(scope, UNKNOWN))
+        else:
+            for child in iter_child_nodes(node):
+                self.visit(child, scopes)
+
+    def visit_scope(self, block, scopes):
+        """Analyzes a block that runs in a new scope."""
+        scopes.append({})
+        self.visit(block, scopes)
+        scopes.pop()
+
+    def visit_loop(self, loop, scopes):
+        """Analyzes a while loop until the types at its start stop changing."""
+        while True:
+            start = _copy(scopes)
+            self.visit(loop.cond, scopes)
+            done = _copy(scopes)
+            self.visit_scope(loop.body, scopes)
+            _join_into(scopes, start)
+            if scopes == start:
+                scopes[:] = done
+                return
+
+    def visit_for(self, loop, scopes):
+        """
+        Analyzes a for loop like :meth:`visit_loop`. The variable of a range loop is
+        an int; a loop over a generator resumes it before every iteration, which
+        may assign variables like a call.
+        """
+        generator = isinstance(loop, ForEachNode)
+        for child in iter_child_nodes(loop):
+            if child is not loop.body:
+                self.visit(child, scopes)
+        while True:
+            start = _copy(scopes)
+            if generator:
+                self.call(None, scopes)
+            scopes.append({loop.name: UNKNOWN if generator else INT})
+            self.visit(loop.body, scopes)
+            scopes.pop()
+            _join_into(scopes, start)
+            if scopes == start:
+                return
+
+    def visit_function(self, func):
+        """Analyzes a function body once, knowing nothing of its caller."""
+        if func in self.analyzed:
+            return
+        self.analyzed.add(func)
+        context = self.context
+        self.context = func.name
+        scopes = [dict.fromkeys(func.params, UNKNOWN)]
+        for stmt in func.body:
+            self.visit(stmt, scopes)
+        self.context = context
+
+    def call(self, name, scopes):
+        """Forgets the types of the variables a called function may assign."""
+        names = self.clobbered if name in self.functions else None
+        for scope in scopes:
+            for var in scope:
+                if names is None or var in names:
+                    scope[var] = UNKNOWN
+
+    def sites(self):
+        """Describes the mixed-type sites found, in program order."""
+        sites = []
+        for node, (left, right, context) in self.operands.items():
+            if UNKNOWN not in (left, right) and _kind(left) != _kind(right):
+                sites.append(
+                    f"in {context}: {describe(node)} ({left} {node.op} {right})"
+                )
+        for (context, name), kinds in self.assigned.items():
+            if len({_kind(kind) for kind in kinds}) > 1:
+                names = ", ".join(dict.fromkeys(kinds))
+                sites.append(f"in {context}: variable {name} is assigned {names}")
+        return sites
+
+
+def infer_types(tree, funcs=()):
+    """
+    Infers the types of a program and marks its numeric operations, in place.
+
+    Every ``+`` and ``-`` of the tree and of ``funcs`` gets ``numeric`` set, to True
+    when both of its operands are proven numeric, so a tree can be analyzed again
+    after a change; the compiled code of the functions and loops whose operations
+    changed is dropped (watch mode re-runs nodes that may already be compiled).
+
+    :param tree: The root of the AST, usually the program's BlockNode.
+    :param funcs: FuncDeclNodes the program may call without declaring them, for
+                  example the functions restored from a snapshot.
+    :return: The :class:`Inference`.
+    """
+    funcs = list(funcs)
+    declared = [node for node in walk(tree) if isinstance(node, FuncDeclNode)]
+    analyzer = _Analyzer(declared + funcs)
+    analyzer.visit(tree, [{}])
+    for func in funcs:
+        analyzer.visit_function(func)
+    operations = numeric = 0
+    changed = set()
+    for root in [tree] + funcs:
+        for node in walk(root):
+            if isinstance(node, BinaryOpNode) and node.op in _FAST_OPS:
+                left, right, _context = analyzer.operands.get(node, (UNKNOWN,) * 3)
+                flag = left in NUMERIC and right in NUMERIC
+                if flag != node.numeric:
+                    changed.add(node)
+                node.numeric = flag
+                operations += 1
+                numeric += flag
+    if changed:
+        _invalidate([tree] + funcs, changed)
+    return Inference(operations, numeric, analyzer.sites())
+
+
+def _invalidate(roots, changed):
+    """
+    Drops the compiled code of the functions and loops containing an operation whose
+    ``numeric`` flag changed, since it was generated for the old flag (see
+    :mod:`common.tiering`). Their counts start over, so they are compiled again
+    once hot.
+
+    :param roots: The trees to look in.
+    :param changed: The BinaryOpNodes whose flag changed.
+    """
+    for root in roots:
+        for node in walk(root):
+            if not getattr(node, "compiled", None):
+                continue
+            if any(inner in changed for inner in walk(node)):
+                node.compiled = None
+                if isinstance(node, FuncDeclNode):
+                    node.calls = 0
+                else:
+                    node.iterations = 0
@@ -1,10 +1,31 @@
 """Interpreter for the MyLang language."""
 
-from common.nodes import BlockNode
+import os
+import sys
+
+from common.metrics import ENVIRONMENTS, Metrics, record_hops
+from common.modules import ModuleCache
+from common.nodes import (
+    UNSET,
+    BlockNode,
+    CountedLoopNode,
+    ForEachNode,
+    ForNode,
+    IfNode,
+    VarAccessNode,
+    WhileNode,
+    YieldNode,
+    walk,
+)
 
 
 # pylint: disable=C0103
 class Environment:
+    # Modules imported into this environment, and whether its variables are
+    # read-only. Class-level defaults, so plain scopes don't pay for them.
+    imports = ()
+    frozen = False
+
     def __init__(self, parent=None):
         """Initializes a new Environment.
 
@@ -13,20 +34,37 @@ class Environment:
         self.vars = {}
         self.funcs = {}
         self.parent = parent
+        ENVIRONMENTS.allocated += 1
 
     def get(self, name):
         """
         Retrieves the value of a variable by its name from the current environment.
 
+        Modules imported into an environment are searched after its own variables.
+
         :param name: The name of the variable to retrieve.
         :return: The value of the variable.
         :raises NameError: If the variable is not found in the current or any parent environment.
         """
-        if name in self.vars:
-            return self.vars[name]
-        if self.parent:
-            return self.parent.get(name)
-        raise NameError(f"Undefined variable '{name}'")
+        env = self
+        hops = 0
+        while name not in env.vars:
+            if env.imports:
+                for module in env.imports:
+                    module_vars = module.namespace().vars
+                    if name in module_vars:
+                        record_hops(ENVIRONMENTS.get_hops, hops)
+                        return module_vars[name]
+            env = env.parent
+            if env is None:
+                raise NameError(f"Undefined variable '{name}'")
+            hops += 1
+        histogram = ENVIRONMENTS.get_hops
+        try:
+            histogram[hops] += 1
+        except IndexError:
+            record_hops(histogram, hops)
+        return env.vars[name]
 
     def set(self, name, value):
         """
@@ -34,14 +72,26 @@ class Environment:
 
         :param name: The name of the variable to set.
         :param value: The value to set the variable to.
-        :raises NameError: If the variable is not found in the current or any parent environment.
-        """
-        if name in self.vars:
-            self.vars[name] = value
-        elif self.parent:
-            self.parent.set(name, value)
-        else:
-            raise NameError(f"Undefined variable '{name}'")
+        :raises NameError: If the variable is not found in the current or any parent
+                           environment, or belongs to an imported module.
+        """
+        env = self
+        hops = 0
+        while name not in env.vars:
+            if env.imports and any(name in m.namespace().vars for m in env.imports):
+                raise NameError(f"Cannot assign to module variable '{name}'")
+            env = env.parent
+            if env is None:
+                raise NameError(f"Undefined variable '{name}'")
+            hops += 1
+        if env.frozen:
+            raise NameError(f"Cannot assign to module variable '{name}'")
+        env.vars[name] = value
+        histogram = ENVIRONMENTS.set_hops
+        try:
+            histogram[hops] += 1
+        except IndexError:
+            record_hops(histogram, hops)
 
     def define(self, name, value):
         """
@@ -69,12 +119,82 @@ class Environment:
         :return: The function node of the function.
         :raises NameError: If the function is not found in the current or any parent environment.
         """
+        return self.find_func(name)[0]
+
+    def find_func(self, name):
+        """
+        Retrieves a function and the scope its calls should run in.
+
+        Functions found in this environment or its parents run in a child of the
+        caller's environment, so the returned scope is None. Functions of an imported
+        module run in a child of that module's environment, which is returned.
+
+        :param name: The name of the function to retrieve.
+        :return: A ``(func_node, scope)`` tuple.
+        :raises NameError: If the function is not found in the current or any parent environment.
+        """
         if name in self.funcs:
-            return self.funcs[name]
+            return self.funcs[name], None
+        if self.imports:
+            for module in self.imports:
+                namespace = module.namespace()
+                if name in namespace.funcs:
+                    return namespace.funcs[name], namespace
         if self.parent:
-            return self.parent.get_func(name)
+            return self.parent.find_func(name)
         raise NameError(f"Undefined function '{name}'")
 
+    def add_import(self, module):
+        """
+        Makes a module's functions and variables visible in this environment.
+
+        :param module: The Module to import.
+        """
+        if not self.imports:
+            self.imports = []
+        if module not in self.imports:
+            self.imports.append(module)
+
+
+_NUMBERS = frozenset((int, float))
+
+
+def _owner(env, name):
+    """
+    Finds the environment whose own variables hold ``name``.
+
+    :param env: The environment to start the search from.
+    :param name: The variable name.
+    :return: The environment, or None if the variable is undefined, read-only, or
+             might be shadowed by an imported module along the way.
+    """
+    while env is not None:
+        if name in env.vars:
+            return None if env.frozen else env
+        if env.imports:
+            return None
+        env = env.parent
+    return None
+
+
+def _guards(env, expr):
+    """
+    Snapshots the variables an expression reads, to detect when they change.
+
+    :param env: The environment the expression is evaluated in.
+    :param expr: The expression.
+    :return: A list of ``(vars, name, value)`` tuples, or None if one of the
+             variables cannot be watched (see :func:`_owner`).
+    """
+    guards = []
+    for access in walk(expr):
+        if isinstance(access, VarAccessNode) and access.name not in ("true", "false"):
+            owner = _owner(env, access.name)
+            if owner is None:
+                return None
+            guards.append((owner.vars, access.name, owner.vars[access.name]))
+    return guards
+
 
 def _to_number(val):
     """
@@ -96,14 +216,141 @@ def _to_number(val):
     return None
 
 
-class Interpreter:
-    def __init__(self):
+class ReturnSignal(Exception):
+    """Raised by a ``return`` statement and caught by the function call running it."""
+
+    def __init__(self, value):
+        super().__init__("'return' outside function")
+        self.value = value
+
+
+class Generator:
+    def __init__(self, name, frames):
+        """
+        Initializes a new Generator, the value of a call of a function with ``yield``.
+
+        :param name: The name of the function.
+        :param frames: The Python generator running the body, see run_generator.
+        """
+        self.name = name
+        self._frames = frames
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._frames)
+
+    def __str__(self):
+        return f"<generator {self.name}>"
+
+
+def _generator(value):
+    """Checks that the value a ``for (x in ...)`` loop iterates is a Generator."""
+    if not isinstance(value, Generator):
+        raise TypeError(
+            f"for loop expects a generator or a range a..b, got {type(value).__name__}"
+        )
+    return value
+
+
+def _frames(env, name, values):
+    """
+    Yields the scope of every iteration of a ``for`` loop below ``env``, with the
+    variable ``name`` bound to each of the ``values``: a single scope, emptied before
+    every iteration unless the body declared a function or imported a module in it.
+    """
+    frame = Environment(env)
+    frame_vars = frame.vars
+    for value in values:
+        if frame.funcs or frame.imports:
+            frame = Environment(env)
+            frame_vars = frame.vars
+        else:
+            frame_vars.clear()
+        frame_vars[name] = value
+        yield frame
+
+
+def _for_range(start, end, step=1):
+    """
+    Returns the values of a ``for`` loop variable, ``start..end step step``.
+
+    :param start: The first value.
+    :param end: The last value, included if the steps reach it.
+    :param step: The increment, which may be negative.
+    :return: A Python range.
+    :raises TypeError: If a bound or the step is not an integer.
+    :raises ValueError: If the step is zero.
+    """
+    for value in (start, end, step):
+        if value.__class__ is not int:
+            raise TypeError(
+                f"for loop bounds and step must be integers, got {type(value).__name__}"
+            )
+    if step == 0:
+        raise ValueError("for loop step cannot be zero")
+    return range(start, end + 1 if step > 0 else end - 1, step)
+
+
+def _add(left, right):
+    """
+    Adds two values: numbers (or numeric strings) are summed, anything else is
+    concatenated as strings.
+
+    :param left: The left operand.
+    :param right: The right operand.
+    :return: The sum or the concatenation.
+    """
+    if left.__class__ in _NUMBERS and right.__class__ in _NUMBERS:
+        return left + right
+    lnum = _to_number(left)
+    rnum = _to_number(right)
+    if lnum is not None and rnum is not None:
+        return lnum + rnum
+    return str(left) + str(right)
+
+
+class Interpreter:  # pylint: disable=R0904
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        base_dir=None,
+        modules=None,
+        tier=None,
+        *,
+        memo=None,
+        metrics=None,
+        pool=None,
+    ):
         """
         Initializes a new Interpreter.
 
         Creates a new global environment and assigns it to the global_env attribute.
+
+        :param base_dir: The directory that import paths are relative to, defaults to
+                         the current working directory.
+        :param modules: The ModuleCache used for imports, defaults to the process-wide
+                        cache shared by every Interpreter.
+        :param tier: A :class:`common.tiering.Tier` that compiles hot functions and
+                     loops, or None to only tree-walk.
+        :param memo: A :class:`common.purity.Memo` caching the results of pure
+                     functions, or None to run every call.
+        :param metrics: The :class:`common.metrics.Metrics` to count into, defaults
+                        to a new one.
+        :param pool: The :class:`common.parallel.WorkerPool` or ``SerialPool`` that
+                     runs spawned calls, or None if ``spawn`` is not available.
         """
         self.global_env = Environment()
+        self.base_dir = base_dir
+        self.modules = modules if modules is not None else MODULES
+        self.tier = tier
+        self.memo = memo
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._evaluated = self.metrics.nodes
+        self.pool = pool
+
+    # pylint: enable=R0913
 
     def visit(self, node, env=None):
         """
@@ -120,9 +367,11 @@ class Interpreter:
         """
         if env is None:
             env = self.global_env
-        method_name = f"visit_{type(node).__name__}"
+        cls = type(node)
+        self._evaluated[cls] += 1
+        method_name = f"visit_{cls.__name__}"
         if not hasattr(self, method_name):
-            raise Exception(f"No visit method for {type(node).__name__}")
+            raise Exception(f"No visit method for {cls.__name__}")
         return getattr(self, method_name)(node, env)
 
     def visit_BlockNode(self, node, env):
@@ -234,12 +483,12 @@ class Interpreter:
         right = self.visit(node.right, env)
         op = node.op
         if op == "+":
-            lnum = _to_number(left)
-            rnum = _to_number(right)
-            if lnum is not None and rnum is not None:
-                return lnum + rnum
-            return str(left) + str(right)
+            if node.numeric:
+                return left + right
+            return _add(left, right)
         if op == "-":
+            if node.numeric:
+                return left - right
             lnum = _to_number(left)
             rnum = _to_number(right)
             return lnum - rnum
@@ -314,17 +563,158 @@ class Interpreter:
 
         This method evaluates the condition of a WhileNode and runs the body of the loop
         until the condition is false. If the condition is true, the body of the loop is
-        executed; if it is false, the loop is terminated.
+        executed; if it is false, the loop is terminated. Once the loop is hot, the rest
+        of it runs as compiled code (see :mod:`common.tiering`).
 
         :param node: The WhileNode containing the condition and body of the loop.
         :param env: The environment in which to evaluate the condition and body.
         :return: The result of evaluating the body of the loop the last time it was run.
         """
+        tier = self.tier
+        if tier is not None and node.compiled:
+            return node.compiled(self, env, None)
         result = None
         while self.visit(node.cond, env):
             result = self.visit(node.body, Environment(env))
+            node.iterations += 1
+            if tier is not None and node.iterations >= tier.threshold:
+                compiled = tier.promote_loop(node)
+                if compiled:
+                    return compiled(self, env, result)
+        return result
+
+    def visit_ForNode(self, node, env):
+        """
+        Visits a ForNode and runs the loop as a Python range loop.
+
+        The bounds and the step are evaluated once, before the first iteration. The
+        loop variable lives in a single scope, created once and emptied before every
+        iteration, which the body runs in; assigning the variable in the body does
+        not change the values it takes. Once the loop is hot, the rest of it runs as
+        compiled code (see :mod:`common.tiering`).
+
+        :param node: The ForNode containing the loop variable, bounds, step and body.
+        :param env: The environment in which to evaluate the bounds and run the loop.
+        :return: The result of evaluating the body the last time it was run.
+        """
+        return self._iterate(node, env, self._loop_values(node, env))
+
+    def visit_ForEachNode(self, node, env):
+        """
+        Visits a ForEachNode and runs the loop over a generator, like visit_ForNode.
+
+        :param node: The ForEachNode containing the loop variable, the generator
+                     expression and the body.
+        :param env: The environment in which to evaluate the generator and run the loop.
+        :return: The result of evaluating the body the last time it was run.
+        :raises TypeError: If the expression does not give a generator.
+        """
+        return self._iterate(node, env, self._loop_values(node, env))
+
+    def _loop_values(self, node, env):
+        """Evaluates the values of a ForNode or ForEachNode, as an iterator."""
+        if isinstance(node, ForEachNode):
+            return _generator(self.visit(node.iterable, env))
+        start = self.visit(node.start, env)
+        end = self.visit(node.end, env)
+        step = 1 if node.step is None else self.visit(node.step, env)
+        return iter(_for_range(start, end, step))
+
+    def _iterate(self, node, env, values):
+        """
+        Runs the body of a ForNode or ForEachNode once per value.
+
+        :param node: The loop node.
+        :param env: The environment the loop runs in.
+        :param values: An iterator of the values of the loop variable.
+        :return: The result of evaluating the body the last time it was run.
+        """
+        tier = self.tier
+        if tier is not None and node.compiled:
+            return node.compiled(self, env, values, None)
+        body = node.body
+        result = None
+        for frame in _frames(env, node.name, values):
+            result = self.visit(body, frame)
+            node.iterations += 1
+            if tier is not None and node.iterations >= tier.threshold:
+                compiled = tier.promote_loop(node)
+                if compiled:
+                    return compiled(self, env, values, result)
         return result
 
+    def visit_HoistedLoopNode(self, node, env):
+        """
+        Visits a HoistedLoopNode: computes the loop's hoisted expressions, then runs it.
+
+        An expression that fails to evaluate is left unset, so it is evaluated in place
+        and raises exactly where the unoptimized loop would have.
+
+        :param node: The HoistedLoopNode containing the loop and its hoisted expressions.
+        :param env: The environment in which to run the loop.
+        :return: The result of the loop.
+        """
+        for hoisted in node.hoisted:
+            try:
+                hoisted.value = self.visit(hoisted.expr, env)
+            except Exception:
+                hoisted.value = UNSET
+        return self.visit(node.loop, env)
+
+    def visit_HoistedNode(self, node, env):
+        """
+        Visits a HoistedNode and returns the value computed on loop entry.
+
+        :param node: The HoistedNode containing the loop-invariant expression.
+        :param env: The environment in which to evaluate the expression if needed.
+        :return: The value of the expression.
+        """
+        value = node.value
+        if value is UNSET:
+            return self.visit(node.expr, env)
+        return value
+
+    def visit_CountedLoopNode(self, node, env):
+        """
+        Visits a CountedLoopNode and runs the loop as a Python range loop.
+
+        The induction variable is written straight into the environment that holds it,
+        and the bound is evaluated once. If the variables are not plain integers, or if
+        the body changes the induction variable or a variable of the bound (e.g. through
+        a called function), the rest of the loop runs as an ordinary WhileNode.
+
+        :param node: The CountedLoopNode containing the loop.
+        :param env: The environment in which to run the loop.
+        :return: None, the result of the loop's trailing increment.
+        """
+        name = node.name
+        owner = _owner(env, name)
+        if owner is None:
+            return self.visit(node.loop, env)
+        ivars = owner.vars
+        start = ivars[name]
+        limit = self.visit(node.limit, env)
+        # pylint: disable=C0123
+        if type(start) is not int or type(limit) is not int:
+            return self.visit(node.loop, env)
+        guards = _guards(env, node.limit)
+        if guards is None:
+            return self.visit(node.loop, env)
+
+        stop = limit + 1 if node.inclusive else limit
+        body = node.body
+        for i in range(start, stop):
+            ivars[name] = i
+            self.visit(body, Environment(env))
+            if ivars.get(name) is not i or any(
+                scope.get(var) is not value for scope, var, value in guards
+            ):
+                self.visit(node.increment, env)
+                return self.visit(node.loop, env)
+        if start < stop:
+            ivars[name] = stop
+        return None
+
     def visit_FuncDeclNode(self, node, env):
         """
         Visits a FuncDeclNode and defines a function in the current environment.
@@ -353,17 +743,191 @@ class Interpreter:
         :return: The result of evaluating the function call expression.
         """
         if node.name == "print":
-            value = self.visit(node.args[0], env)
-            print(value)
+            self.emit(self.visit(node.args[0], env))
             return None
         if node.name == "input":
             prompt = self.visit(node.args[0], env)
             return input(prompt)
-        func = env.get_func(node.name)
-        new_env = Environment(env)
+        func, scope = env.find_func(node.name)
+        new_env = Environment(env if scope is None else scope)
         for param, arg in zip(func.params, node.args):
             new_env.define(param, self.visit(arg, env))
-        return self.visit(BlockNode(func.body), new_env)
+        return self.run_function(func, new_env)
+
+    def run_function(self, func, env):
+        """
+        Runs a function's body in its call environment.
+
+        Calls are counted on the FuncDeclNode, and once the function is hot its body
+        runs as compiled code (see :mod:`common.tiering`). With a memo, calls of pure
+        functions with all their arguments are looked up in it first (see
+        :mod:`common.purity`).
+
+        A function with a ``yield`` does not run yet: the call returns a
+        :class:`Generator`, see :meth:`run_generator`.
+
+        :param func: The FuncDeclNode of the function.
+        :param env: The call environment, with the parameters defined.
+        :return: The value returned, or else the result of the body's last statement.
+        """
+        self.metrics.calls += 1
+        memo = self.memo
+        if memo is not None:
+            if func.pure and len(env.vars) == len(func.params):
+                args = tuple(env.vars.values())
+                return memo.call(func, args, lambda: self._run_body(func, env))
+            memo.impure_call()
+        if func.yielding:
+            return Generator(func.name, self.run_generator(func, env))
+        return self._run_body(func, env)
+
+    def _run_body(self, func, env):
+        """Runs a function's body, see :meth:`run_function`."""
+        func.calls += 1
+        tier = self.tier
+        try:
+            if tier is not None:
+                compiled = func.compiled
+                if compiled is None:
+                    compiled = tier.function_called(func)
+                if compiled:
+                    return compiled(self, env)
+            return self.visit(BlockNode(func.body), env)
+        except ReturnSignal as signal:
+            return signal.value
+
+    def visit_ReturnNode(self, node, env):
+        """
+        Visits a ReturnNode and leaves the running function.
+
+        :param node: The ReturnNode containing the expression to return, if any.
+        :param env: The environment in which to evaluate the expression.
+        :raises ReturnSignal: Always, carrying the value to the function call.
+        """
+        value = self.visit(node.expr, env) if node.expr is not None else None
+        raise ReturnSignal(value)
+
+    def visit_YieldNode(self, node, env):
+        """Visits a YieldNode outside a function body (see run_generator): an error."""
+        raise Exception("'yield' outside function")
+
+    def run_generator(self, func, env):
+        """
+        Runs the body of a function with ``yield``, suspending at every yield.
+
+        Python generators run the statements that contain a yield, so that a
+        suspended call keeps its environments until it is resumed; the other
+        statements run as usual. A ``return`` ends the generator (its value is
+        ignored).
+
+        :param func: The FuncDeclNode of the function.
+        :param env: The call environment, with the parameters defined.
+        :return: A Python generator of the values yielded.
+        """
+        yielding = func.yielding
+        try:
+            for stmt in func.body:
+                yield from self._generate(stmt, env, yielding)
+        except ReturnSignal:
+            pass
+
+    def _generate(self, node, env, yielding):  # pylint: disable=R0912
+        """
+        Runs a statement of a generator body, see :meth:`run_generator`.
+
+        :param node: The statement.
+        :param env: The environment it runs in.
+        :param yielding: The nodes of the body that are or contain a yield.
+        :return: A Python generator of the values yielded.
+        """
+        if node not in yielding:
+            self.visit(node, env)
+            return
+        self._evaluated[type(node)] += 1
+        if isinstance(node, YieldNode):
+            yield self.visit(node.expr, env)
+        elif isinstance(node, BlockNode):
+            for stmt in node.statements:
+                yield from self._generate(stmt, env, yielding)
+        elif isinstance(node, IfNode):
+            block = node.then_block if self.visit(node.cond, env) else node.else_block
+            if block:
+                yield from self._generate(block, Environment(env), yielding)
+        elif isinstance(node, WhileNode):
+            while self.visit(node.cond, env):
+                yield from self._generate(node.body, Environment(env), yielding)
+        elif isinstance(node, CountedLoopNode):
+            yield from self._generate(node.loop, env, yielding)
+        elif isinstance(node, (ForNode, ForEachNode)):
+            values = self._loop_values(node, env)
+            for frame in _frames(env, node.name, values):
+                yield from self._generate(node.body, frame, yielding)
+        else:
+            raise Exception(f"'yield' is not supported in {type(node).__name__}")
+
+    def call(self, name, args):
+        """
+        Calls a global function with argument values, as from a new top-level scope.
+
+        :param name: The name of the function.
+        :param args: The argument values; extra values are ignored, and missing
+                     parameters are left undefined, as in a call.
+        :return: The result of the call.
+        """
+        caller = Environment(self.global_env)
+        func, scope = caller.find_func(name)
+        new_env = Environment(caller if scope is None else scope)
+        for param, value in zip(func.params, args):
+            new_env.define(param, value)
+        return self.run_function(func, new_env)
+
+    def visit_SpawnNode(self, node, env):
+        """
+        Visits a SpawnNode and starts the call on the worker pool.
+
+        The function is looked up and its arguments are evaluated here, as for a call.
+        Workers only know the global functions and imports, so the name must resolve
+        to one of those from here too.
+
+        :param node: The SpawnNode containing the call.
+        :param env: The environment in which to evaluate the arguments.
+        :return: The handle of the spawned call.
+        :raises NameError: If the function is not defined, or is declared inside a
+                           block or function.
+        :raises RuntimeError: If the Interpreter has no pool.
+        """
+        call = node.call
+        func, _scope = env.find_func(call.name)
+        try:
+            global_func, _scope = self.global_env.find_func(call.name)
+        except NameError:
+            global_func = None
+        if global_func is not func:
+            raise NameError(
+                f"Cannot spawn '{call.name}': only top-level and imported functions"
+                " can be spawned"
+            )
+        args = tuple(
+            self.visit(arg, env) for arg, _param in zip(call.args, func.params)
+        )
+        if self.pool is None:
+            raise RuntimeError("spawn is not available: no worker pool")
+        return self.pool.spawn(self, call.name, args)
+
+    def visit_JoinNode(self, node, env):
+        """
+        Visits a JoinNode and waits for a spawned call, see
+        :func:`common.parallel.join_handle`.
+
+        :param node: The JoinNode containing the handle expression.
+        :param env: The environment in which to evaluate the handle.
+        :return: The value the spawned call returned.
+        :raises RuntimeError: If the Interpreter has no pool.
+        """
+        handle = self.visit(node.handle, env)
+        if self.pool is None:
+            raise RuntimeError("join is not available: no worker pool")
+        return self.pool.join(self, handle)
 
     def visit_PrintNode(self, node, env):
         """
@@ -377,8 +941,24 @@ class Interpreter:
         :return: None
         """
 
-        value = self.visit(node.expr, env)
-        print(value)
+        self.emit(self.visit(node.expr, env))
+
+    def emit(self, value):
+        """
+        Prints a value for the running program, counting the bytes written.
+
+        :param value: The value to print.
+        """
+        self.write(f"{value}\n")
+
+    def write(self, text):
+        """
+        Writes text to the program's output, counting the bytes written.
+
+        :param text: The text to write.
+        """
+        sys.stdout.write(text)
+        self.metrics.printed_bytes += len(text.encode("utf-8", "replace"))
 
     def visit_InputNode(self, node, _env):
         """
@@ -396,5 +976,37 @@ class Interpreter:
         prompt = node.prompt
         return input(prompt)
 
+    def visit_ImportNode(self, node, env):
+        """
+        Visits an ImportNode and makes the module visible in the current environment.
+
+        The module file is located relative to the interpreter's base directory and
+        looked up in the module cache. It is not parsed or run until one of its names
+        is first used.
+
+        :param node: The ImportNode containing the module path.
+        :param env: The environment to import the module into.
+        :return: None
+        :raises ImportError: If the module file cannot be read.
+        """
+        base_dir = self.base_dir if self.base_dir is not None else os.getcwd()
+        path = os.path.realpath(os.path.join(base_dir, node.path))
+        env.add_import(self.modules.get(path))
+
 
 # pylint: enable=c0103
+
+
+def _run_module(module):
+    """
+    Runs a module's top-level statements in a fresh global environment.
+
+    :param module: The Module to run.
+    :return: The module's global environment.
+    """
+    interp = Interpreter(base_dir=module.directory, modules=module.cache)
+    interp.visit(module.ast(), interp.global_env)
+    return interp.global_env
+
+
+MODULES = ModuleCache(_run_module)
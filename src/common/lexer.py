@@ -26,6 +26,7 @@ tokens = [
     "RBRACE",
     "COMMA",
     "SEMI",
+    "DOTDOT",
 ]
 
 reserved = {
@@ -33,12 +34,19 @@ reserved = {
     "if": "IF",
     "else": "ELSE",
     "while": "WHILE",
+    "for": "FOR",
+    "in": "IN",
     "func": "FUNC",
     "print": "PRINT",
     "input": "INPUT",
     "and": "AND",
     "or": "OR",
     "not": "NOT",
+    "import": "IMPORT",
+    "return": "RETURN",
+    "yield": "YIELD",
+    "spawn": "SPAWN",
+    "join": "JOIN",
 }
 
 tokens += list(reserved.values())
@@ -60,6 +68,7 @@ t_LBRACE = r"\{"
 t_RBRACE = r"\}"
 t_COMMA = r","
 t_SEMI = r";"
+t_DOTDOT = r"\.\."
 
 t_ignore = " \t"
 t_ignore_COMMENT = r"//.*"
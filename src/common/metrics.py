@@ -0,0 +1,163 @@
+"""Runtime metrics of the MyLang interpreter.
+
+Every Interpreter keeps a :class:`Metrics` object counting the nodes it
+evaluates by type, the function calls it makes and the bytes it prints. Every
+Environment counts into :data:`ENVIRONMENTS`: how many were allocated, and for
+each variable ``get`` and ``set`` how many parent links it followed. The counters
+are always on; each costs a single increment on paths that already do a dict
+lookup or more.
+
+:meth:`Metrics.snapshot` returns the counters as a dict, which
+:meth:`Metrics.to_json` and :meth:`Metrics.to_prometheus` render for dumping.
+"""
+
+import json
+from collections import defaultdict
+
+
+class EnvironmentStats:
+    def __init__(self):
+        """
+        Initializes a new EnvironmentStats.
+
+        Hops are kept as histograms, ``get_hops[n]`` counting the lookups that
+        followed ``n`` parent links, so that recording one is a single increment.
+        """
+        self.allocated = 0
+        self.get_hops = [0] * 16
+        self.set_hops = [0] * 16
+
+    def reset(self):
+        """Sets every counter back to zero."""
+        self.allocated = 0
+        self.get_hops = [0] * 16
+        self.set_hops = [0] * 16
+
+    def summary(self):
+        """
+        Summarizes the counters.
+
+        :return: A dict with the allocation count, and the count, total hops,
+                 average hops and maximum hops of ``get`` and ``set``.
+        """
+        result = {"environments_allocated": self.allocated}
+        for name, hops in (("get", self.get_hops), ("set", self.set_hops)):
+            count = sum(hops)
+            total = sum(n * times for n, times in enumerate(hops))
+            result[name] = {
+                "count": count,
+                "hops": total,
+                "hops_avg": total / count if count else 0.0,
+                "hops_max": max(
+                    (n for n, times in enumerate(hops) if times), default=0
+                ),
+            }
+        return result
+
+
+def record_hops(histogram, hops):
+    """
+    Records a lookup in a hops histogram, extending it if needed.
+
+    :param histogram: The histogram.
+    :param hops: The number of parent links the lookup followed.
+    """
+    if hops >= len(histogram):
+        histogram.extend([0] * (hops + 1 - len(histogram)))
+    histogram[hops] += 1
+
+
+# The counters of every Environment in the process.
+ENVIRONMENTS = EnvironmentStats()
+
+
+class Metrics:
+    def __init__(self):
+        """Initializes a new Metrics with every counter at zero."""
+        self.nodes = defaultdict(int)  # node class -> times evaluated
+        self.calls = 0
+        self.printed_bytes = 0
+
+    def snapshot(self, environments=ENVIRONMENTS):
+        """
+        Returns the current value of every counter.
+
+        :param environments: The EnvironmentStats to include, defaults to the
+                             process-wide counters.
+        :return: A dict, see the README for its keys.
+        """
+        nodes = {cls.__name__: count for cls, count in self.nodes.items()}
+        result = {
+            "nodes_evaluated": dict(sorted(nodes.items())),
+            "nodes_evaluated_total": sum(nodes.values()),
+            "function_calls": self.calls,
+            "printed_bytes": self.printed_bytes,
+        }
+        result.update(environments.summary())
+        return result
+
+    def to_json(self):
+        """
+        Renders the counters as JSON.
+
+        :return: The JSON text.
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Renders the counters in the Prometheus text exposition format.
+
+        :return: The metrics text, ending with a newline.
+        """
+        data = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP mylang_{name} {help_text}")
+            lines.append(f"# TYPE mylang_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"mylang_{name}{labels} {value}")
+
+        metric(
+            "nodes_evaluated_total",
+            "counter",
+            "Syntax tree nodes evaluated by the tree-walker, by node type.",
+            [(f'{{type="{name}"}}', n) for name, n in data["nodes_evaluated"].items()],
+        )
+        metric(
+            "environments_allocated_total",
+            "counter",
+            "Environments (scopes) allocated.",
+            [("", data["environments_allocated"])],
+        )
+        for suffix, key, kind, help_text in (
+            ("lookups_total", "count", "counter", "Variable lookups."),
+            (
+                "lookup_hops_total",
+                "hops",
+                "counter",
+                "Parent scopes walked by lookups.",
+            ),
+            (
+                "lookup_hops_max",
+                "hops_max",
+                "gauge",
+                "Most parent scopes one lookup walked.",
+            ),
+        ):
+            samples = [(f'{{op="{op}"}}', data[op][key]) for op in ("get", "set")]
+            metric(f"variable_{suffix}", kind, help_text, samples)
+        metric(
+            "function_calls_total",
+            "counter",
+            "MyLang function calls.",
+            [("", data["function_calls"])],
+        )
+        metric(
+            "printed_bytes_total",
+            "counter",
+            "Bytes written by print, in UTF-8 with newlines.",
+            [("", data["printed_bytes"])],
+        )
+        return "\n".join(lines) + "\n"
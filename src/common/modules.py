@@ -0,0 +1,124 @@
+"""Module loading and caching for the MyLang language.
+
+An ``import "path.mylang";`` statement binds a :class:`Module` into the importing
+environment. Modules are parsed at most once per process: the cache is keyed by the
+resolved path and revalidated with the file's mtime and size, falling back to a hash
+of its contents when those change. A module's top-level statements run lazily, the
+first time one of its names is looked up, and the resulting namespace is frozen and
+shared read-only by every Interpreter that imports it.
+"""
+
+import hashlib
+import os
+
+from .fastlexer import FastLexer
+from .frontend import parse
+
+
+class Module:
+    def __init__(self, cache, path, stamp, source):
+        """
+        Initializes a new Module.
+
+        :param cache: The ModuleCache that owns the module.
+        :param path: The absolute path of the module file.
+        :param stamp: The ``(mtime_ns, size)`` of the file when it was read.
+        :param source: The file contents, as bytes.
+        """
+        self.cache = cache
+        self.path = path
+        self.directory = os.path.dirname(path)
+        self.stamp = stamp
+        self.digest = hashlib.sha256(source).digest()
+        self._source = source
+        self._ast = None
+        self.env = None
+
+    def ast(self, backend="yacc"):
+        """
+        Returns the parsed module, parsing it on first use.
+
+        :param backend: The parser backend to use, see :func:`common.frontend.parse`.
+        :return: The module's BlockNode.
+        """
+        if self._ast is None:
+            self._ast = parse(self._source, backend=backend, lexer=FastLexer())
+            if self._ast is None:
+                raise ImportError(f"Could not parse module '{self.path}'")
+            self._source = None
+        return self._ast
+
+    def namespace(self):
+        """
+        Returns the module's frozen global environment, running the module if needed.
+        """
+        if self.env is None:
+            self.cache.load(self)
+        return self.env
+
+
+class ModuleCache:
+    def __init__(self, executor, backend="yacc"):
+        """
+        Initializes a new ModuleCache.
+
+        :param executor: A callable taking a Module and returning the Environment
+                         produced by running its top-level statements.
+        :param backend: The parser backend used for modules.
+        """
+        self.executor = executor
+        self.backend = backend
+        self._modules = {}
+        self._loading = []
+
+    def get(self, path):
+        """
+        Returns the module for a path, reusing the cached one if the file is unchanged.
+
+        The file is not parsed here; see :meth:`Module.namespace`.
+
+        :param path: The absolute path of the module file.
+        :return: The Module.
+        :raises ImportError: If the file cannot be read.
+        """
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise ImportError(f"Cannot import '{path}': {e.strerror}") from e
+        stamp = (st.st_mtime_ns, st.st_size)
+        module = self._modules.get(path)
+        if module is not None and module.stamp == stamp:
+            return module
+        with open(path, "rb") as f:
+            source = f.read()
+        fresh = Module(self, path, stamp, source)
+        if module is not None and module.digest == fresh.digest:
+            # Touched but not changed: keep the parsed module.
+            module.stamp = stamp
+            return module
+        self._modules[path] = fresh
+        return fresh
+
+    def load(self, module):
+        """
+        Runs a module's top-level statements and freezes the resulting environment.
+
+        :param module: The Module to load.
+        :raises ImportError: If the module is already being loaded (a circular import).
+        """
+        if module.path in self._loading:
+            cycle = self._loading[self._loading.index(module.path) :]
+            chain = " -> ".join(cycle + [module.path])
+            raise ImportError(f"Circular import: {chain}")
+        self._loading.append(module.path)
+        try:
+            module.ast(self.backend)
+            env = self.executor(module)
+        finally:
+            self._loading.pop()
+        env.frozen = True
+        module.env = env
+
+    def clear(self):
+        """Forgets every cached module."""
+        self._modules.clear()
@@ -1,9 +1,77 @@
 """
 This module contains classes representing different types of nodes in the abstract syntax tree.
+
+Every node class lists its constructor arguments in ``_fields``, in order, which lets
+analysis passes walk and rebuild trees generically (see :func:`iter_child_nodes`).
 """
 
 
+def iter_child_nodes(node):
+    """
+    Yields the direct child nodes of a node, in field order.
+
+    :param node: The node whose children to yield.
+    """
+    for field in node._fields:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            for item in value:
+                if hasattr(item, "_fields"):
+                    yield item
+        elif hasattr(value, "_fields"):
+            yield value
+
+
+def walk(node):
+    """
+    Yields a node and all of its descendants, depth first.
+
+    :param node: The root of the tree to walk.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(iter_child_nodes(node))))
+
+
+def _yielding(statements):
+    """
+    Finds the nodes of a function body that are or contain a YieldNode.
+
+    :param statements: The statements of the body.
+    :return: A frozenset of the nodes, empty if the body has no yield.
+    """
+    found = set()
+
+    def visit(node):
+        if isinstance(node, FuncDeclNode):
+            return False
+        contains = isinstance(node, YieldNode)
+        for child in iter_child_nodes(node):
+            contains = visit(child) or contains
+        if contains:
+            found.add(node)
+        return contains
+
+    for stmt in statements:
+        visit(stmt)
+    return frozenset(found)
+
+
+class _Unset:
+    """Marker for a HoistedNode whose value has not been computed."""
+
+    def __repr__(self):
+        return "UNSET"
+
+
+UNSET = _Unset()
+
+
 class NumberNode:
+    _fields = ("value",)
+
     def __init__(self, value):
         """
         Initializes a new NumberNode with the given value.
@@ -15,6 +83,8 @@ class NumberNode:
 
 
 class StringNode:
+    _fields = ("value",)
+
     def __init__(self, value):
         """
         Initializes a new StringNode with the given value.
@@ -26,6 +96,8 @@ class StringNode:
 
 
 class BinaryOpNode:
+    _fields = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         """
         Initializes a new BinaryOpNode with the given left operand, operator, and right operand.
@@ -38,9 +110,13 @@ class BinaryOpNode:
         :type right: Node
         """
         self.left, self.op, self.right = left, op, right
+        # Whether a "+" or "-" is known to get two numbers, see common.inference.
+        self.numeric = False
 
 
 class UnaryOpNode:
+    _fields = ("op", "operand")
+
     def __init__(self, op, operand):
         """
         Initializes a new UnaryOpNode with the given operator and operand.
@@ -54,6 +130,8 @@ class UnaryOpNode:
 
 
 class VarDeclNode:
+    _fields = ("name", "expr")
+
     def __init__(self, name, expr):
         """
         Initializes a new VarDeclNode with the given name and expression.
@@ -67,6 +145,8 @@ class VarDeclNode:
 
 
 class AssignmentNode:
+    _fields = ("name", "expr")
+
     def __init__(self, name, expr):
         """
         Initializes a new AssignmentNode with the given name and expression.
@@ -80,6 +160,8 @@ class AssignmentNode:
 
 
 class IfNode:
+    _fields = ("cond", "then_block", "else_block")
+
     def __init__(self, cond, then_block, else_block=None):
         """
         Initializes a new IfNode with the given condition, then-block, and else-block.
@@ -96,6 +178,8 @@ class IfNode:
 
 
 class WhileNode:
+    _fields = ("cond", "body")
+
     def __init__(self, cond, body):
         """
         Initializes a new WhileNode with the given condition and body.
@@ -106,9 +190,63 @@ class WhileNode:
         :type body: BlockNode
         """
         self.cond, self.body = cond, body
+        # Iterations run by the interpreter, and the loop's compiled code once it is
+        # hot (see common.tiering); False if it could not be compiled.
+        self.iterations = 0
+        self.compiled = None
+
+
+class ForNode:
+    _fields = ("name", "start", "end", "step", "body")
+
+    def __init__(self, name, start, end, step, body):
+        """
+        Initializes a new ForNode for ``for (name in start..end step step) { body }``.
+
+        :param name: The name of the loop variable.
+        :type name: str
+        :param start: The first value of the loop variable.
+        :type start: Node
+        :param end: The last value of the loop variable, included if the steps
+                    reach it.
+        :type end: Node
+        :param step: The increment, or None for 1.
+        :type step: Node or None
+        :param body: The block of code to execute for every value.
+        :type body: BlockNode
+        """
+        self.name, self.start, self.end, self.step = name, start, end, step
+        self.body = body
+        # Iterations run by the interpreter, and the loop's compiled code once it is
+        # hot (see common.tiering); False if it could not be compiled.
+        self.iterations = 0
+        self.compiled = None
+
+
+class ForEachNode:
+    _fields = ("name", "iterable", "body")
+
+    def __init__(self, name, iterable, body):
+        """
+        Initializes a new ForEachNode for ``for (name in iterable) { body }``.
+
+        :param name: The name of the loop variable.
+        :type name: str
+        :param iterable: The expression giving the generator to consume.
+        :type iterable: Node
+        :param body: The block of code to execute for every value.
+        :type body: BlockNode
+        """
+        self.name, self.iterable, self.body = name, iterable, body
+        # Iterations run by the interpreter, and the loop's compiled code once it is
+        # hot (see common.tiering); False if it could not be compiled.
+        self.iterations = 0
+        self.compiled = None
 
 
 class FuncDeclNode:
+    _fields = ("name", "params", "body")
+
     def __init__(self, name, params, body):
         """
         Initializes a new FuncDeclNode with the given name, parameters, and body.
@@ -121,9 +259,29 @@ class FuncDeclNode:
         :type body: BlockNode
         """
         self.name, self.params, self.body = name, params, body
+        # Number of calls, and the body's compiled code once it is hot (see
+        # common.tiering); False if it could not be compiled.
+        self.calls = 0
+        self.compiled = None
+        # Whether calls may be memoized, see common.purity.
+        self.pure = False
+        self._yielding = None
+
+    @property
+    def yielding(self):
+        """
+        The nodes of the body that are or contain a ``yield``, nested functions
+        aside; calls of a function with any return a generator (see
+        common.interpreter). Found on first use, after any optimization.
+        """
+        if self._yielding is None:
+            self._yielding = _yielding(self.body)
+        return self._yielding
 
 
 class FuncCallNode:
+    _fields = ("name", "args")
+
     def __init__(self, name, args):
         """
         Initializes a new FuncCallNode with the given function name and arguments.
@@ -138,6 +296,8 @@ class FuncCallNode:
 
 
 class PrintNode:
+    _fields = ("expr",)
+
     def __init__(self, expr):
         """
         Initializes a new PrintNode with the given expression to print.
@@ -149,6 +309,8 @@ class PrintNode:
 
 
 class InputNode:
+    _fields = ("prompt",)
+
     def __init__(self, prompt):
         """
         Initializes a new InputNode with the given prompt expression.
@@ -159,7 +321,74 @@ class InputNode:
         self.prompt = prompt
 
 
+class ReturnNode:
+    _fields = ("expr",)
+
+    def __init__(self, expr):
+        """
+        Initializes a new ReturnNode with the given expression.
+
+        :param expr: The expression whose value the function returns, or None.
+        :type expr: Node or None
+        """
+        self.expr = expr
+
+
+class YieldNode:
+    _fields = ("expr",)
+
+    def __init__(self, expr):
+        """
+        Initializes a new YieldNode with the given expression.
+
+        :param expr: The expression whose value the generator produces next.
+        :type expr: Node
+        """
+        self.expr = expr
+
+
+class SpawnNode:
+    _fields = ("call",)
+
+    def __init__(self, call):
+        """
+        Initializes a new SpawnNode with the given function call.
+
+        :param call: The call to run in a worker process.
+        :type call: FuncCallNode
+        """
+        self.call = call
+
+
+class JoinNode:
+    _fields = ("handle",)
+
+    def __init__(self, handle):
+        """
+        Initializes a new JoinNode with the given handle expression.
+
+        :param handle: The expression giving the handle of the spawned call to wait for.
+        :type handle: Node
+        """
+        self.handle = handle
+
+
+class ImportNode:
+    _fields = ("path",)
+
+    def __init__(self, path):
+        """
+        Initializes a new ImportNode with the given module path.
+
+        :param path: The path of the module to import, relative to the importing file.
+        :type path: str
+        """
+        self.path = path
+
+
 class BlockNode:
+    _fields = ("statements",)
+
     def __init__(self, statements):
         """
         Initializes a new BlockNode with the given list of statements.
@@ -171,6 +400,8 @@ class BlockNode:
 
 
 class VarAccessNode:
+    _fields = ("name",)
+
     def __init__(self, name):
         """
         Initializes a new VarAccessNode with the given name.
@@ -179,3 +410,81 @@ class VarAccessNode:
         :type name: str
         """
         self.name = name
+
+
+class HoistedNode:
+    _fields = ("expr",)
+
+    def __init__(self, expr):
+        """
+        Initializes a new HoistedNode wrapping a loop-invariant expression.
+
+        The enclosing HoistedLoopNode evaluates the expression once on loop entry and
+        stores the result in ``value``; a failed evaluation leaves it unset, and the
+        expression is then evaluated in place as usual.
+
+        :param expr: The loop-invariant expression.
+        :type expr: Node
+        """
+        self.expr = expr
+        self.value = UNSET
+
+
+class HoistedLoopNode:
+    _fields = ("loop",)
+
+    def __init__(self, loop):
+        """
+        Initializes a new HoistedLoopNode around a loop with hoisted expressions.
+
+        :param loop: The loop whose body (or condition) contains HoistedNodes.
+        :type loop: WhileNode or CountedLoopNode
+        """
+        self.loop = loop
+        self.hoisted = []
+        stack = list(iter_child_nodes(loop))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, HoistedNode):
+                self.hoisted.append(node)
+            elif not isinstance(node, (HoistedLoopNode, FuncDeclNode)):
+                stack.extend(iter_child_nodes(node))
+
+
+class CountedLoopNode:
+    _fields = ("loop",)
+
+    def __init__(self, loop):
+        """
+        Initializes a new CountedLoopNode for a loop of the form
+        ``while (i < limit) { ...; i = i + 1; }`` (or ``<=``).
+
+        :param loop: The original loop, run as-is when the counted form does not apply.
+        :type loop: WhileNode
+        """
+        self.loop = loop
+
+    @property
+    def name(self):
+        """The name of the induction variable."""
+        return self.loop.cond.left.name
+
+    @property
+    def limit(self):
+        """The expression bounding the induction variable."""
+        return self.loop.cond.right
+
+    @property
+    def inclusive(self):
+        """Whether the loop runs while the variable is equal to the limit."""
+        return self.loop.cond.op == "<="
+
+    @property
+    def body(self):
+        """The loop body without its trailing increment."""
+        return BlockNode(self.loop.body.statements[:-1])
+
+    @property
+    def increment(self):
+        """The trailing ``i = i + 1;`` statement of the loop body."""
+        return self.loop.body.statements[-1]
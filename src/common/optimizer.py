@@ -0,0 +1,206 @@
+"""Loop optimizations for the MyLang AST.
+
+Two rewrites are applied to ``while`` loops:
+
+* Counted loops of the form ``while (i < n) { ...; i = i + 1; }`` (or ``<=``) become
+  CountedLoopNodes, which the interpreter runs as a Python ``range`` loop. The
+  interpreter checks after every iteration that neither the induction variable nor
+  the variables of the bound were changed behind its back (e.g. by a called
+  function, since functions see their caller's variables) and finishes the loop the
+  ordinary way if they were.
+* Loop-invariant subexpressions are wrapped in HoistedNodes and computed once on
+  loop entry. An expression is invariant if it has no calls or input and none of its
+  variables are assigned or declared anywhere in the loop; loops containing calls
+  are left alone, as a called function may assign any variable it can see.
+"""
+
+from .nodes import (
+    AssignmentNode,
+    BinaryOpNode,
+    CountedLoopNode,
+    ForEachNode,
+    ForNode,
+    FuncCallNode,
+    FuncDeclNode,
+    HoistedLoopNode,
+    HoistedNode,
+    ImportNode,
+    InputNode,
+    JoinNode,
+    NumberNode,
+    UnaryOpNode,
+    VarAccessNode,
+    VarDeclNode,
+    WhileNode,
+    YieldNode,
+    walk,
+)
+
+_CONSTANT_NAMES = frozenset(("true", "false"))
+
+
+def optimize(tree):
+    """
+    Applies the loop optimizations to a program, in place.
+
+    Already optimized loops are left as they are, so optimizing twice is harmless.
+
+    :param tree: The root of the AST, usually the program's BlockNode.
+    :return: The optimized tree.
+    """
+    return _optimize(tree)
+
+
+def _optimize(node):
+    """Rewrites the loops in ``node``'s subtree, innermost first."""
+    if isinstance(node, (CountedLoopNode, HoistedLoopNode)):
+        return node
+    _optimize_children(node)
+    if isinstance(node, WhileNode):
+        return _optimize_loop(node)
+    return node
+
+
+def _optimize_children(node):
+    """Applies :func:`_optimize` to every child of ``node``."""
+    for field in node._fields:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            value[:] = [
+                _optimize(item) if hasattr(item, "_fields") else item for item in value
+            ]
+        elif hasattr(value, "_fields"):
+            setattr(node, field, _optimize(value))
+
+
+def _scan(nodes):
+    """
+    Collects what a loop may change.
+
+    :param nodes: The nodes to scan (e.g. the loop's condition and body).
+    :return: ``(assigned, declared, has_calls)``: the names assigned and declared
+             anywhere in the nodes, and whether they contain a function call or import,
+             or run other code while they are suspended (``yield``) or consume a
+             generator.
+    """
+    assigned, declared, has_calls = set(), set(), False
+    for root in nodes:
+        for node in walk(root):
+            if isinstance(node, AssignmentNode):
+                assigned.add(node.name)
+            elif isinstance(node, (VarDeclNode, ForNode)):
+                declared.add(node.name)
+            elif isinstance(node, ForEachNode):
+                declared.add(node.name)
+                has_calls = True
+            elif isinstance(node, (FuncCallNode, ImportNode, YieldNode)):
+                has_calls = True
+    return assigned, declared, has_calls
+
+
+def _is_pure(expr, changed):
+    """
+    Checks whether an expression is free of calls, input and joins, and reads no
+    changed name.
+
+    :param expr: The expression to check.
+    :param changed: Names that may change while the loop runs.
+    """
+    for node in walk(expr):
+        if isinstance(node, (FuncCallNode, InputNode, JoinNode)):
+            return False
+        if isinstance(node, VarAccessNode) and node.name in changed:
+            return False
+    return True
+
+
+def _is_increment(stmt, name):
+    """Checks whether ``stmt`` is ``name = name + 1;``."""
+    return (
+        isinstance(stmt, AssignmentNode)
+        and stmt.name == name
+        and isinstance(stmt.expr, BinaryOpNode)
+        and stmt.expr.op == "+"
+        and isinstance(stmt.expr.left, VarAccessNode)
+        and stmt.expr.left.name == name
+        and isinstance(stmt.expr.right, NumberNode)
+        and type(stmt.expr.right.value) is int  # pylint: disable=C0123
+        and stmt.expr.right.value == 1
+    )
+
+
+def _is_counted(loop):
+    """
+    Checks whether a loop has the counted form ``while (i < n) { ...; i = i + 1; }``.
+
+    The bound must be free of calls and must not read variables the body assigns or
+    declares, and the body may not otherwise assign or declare ``i``.
+
+    :param loop: The WhileNode to inspect.
+    """
+    cond = loop.cond
+    statements = loop.body.statements
+    if not (
+        isinstance(cond, BinaryOpNode)
+        and cond.op in ("<", "<=")
+        and isinstance(cond.left, VarAccessNode)
+        and cond.left.name not in _CONSTANT_NAMES
+        and statements
+    ):
+        return False
+    name = cond.left.name
+    if not _is_increment(statements[-1], name):
+        return False
+    assigned, declared, _has_calls = _scan(statements[:-1])
+    changed = assigned | declared | {name}
+    return name not in assigned | declared and _is_pure(cond.right, changed)
+
+
+def _hoist(expr, changed):
+    """
+    Wraps the maximal invariant subexpressions of ``expr`` in HoistedNodes.
+
+    :param expr: The expression to rewrite.
+    :param changed: Names that may change while the loop runs.
+    :return: The rewritten expression and the number of expressions hoisted.
+    """
+    if isinstance(expr, (BinaryOpNode, UnaryOpNode)) and _is_pure(expr, changed):
+        return HoistedNode(expr), 1
+    if isinstance(expr, (HoistedNode, HoistedLoopNode, FuncDeclNode)):
+        # Inner loops with hoisted expressions refresh only their own, so nothing
+        # is hoisted into them.
+        return expr, 0
+    count = 0
+    for field in expr._fields:
+        value = getattr(expr, field)
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                if hasattr(item, "_fields"):
+                    value[index], hoisted = _hoist(item, changed)
+                    count += hoisted
+        elif hasattr(value, "_fields"):
+            new_value, hoisted = _hoist(value, changed)
+            setattr(expr, field, new_value)
+            count += hoisted
+    return expr, count
+
+
+def _optimize_loop(loop):
+    """
+    Applies the counted-loop and hoisting rewrites to a single WhileNode.
+
+    :param loop: The WhileNode to optimize.
+    :return: The replacement node.
+    """
+    counted = _is_counted(loop)
+    hoisted = 0
+    assigned, declared, has_calls = _scan([loop.cond, loop.body])
+    if not has_calls:
+        changed = assigned | declared
+        if not counted:
+            # A counted loop evaluates its bound only once anyway.
+            loop.cond, hoisted = _hoist(loop.cond, changed)
+        loop.body, body_hoisted = _hoist(loop.body, changed)
+        hoisted += body_hoisted
+    node = CountedLoopNode(loop) if counted else loop
+    return HoistedLoopNode(node) if hoisted else node
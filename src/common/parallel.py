@@ -0,0 +1,276 @@
+"""Parallel calls for the MyLang language: ``spawn`` and ``join``.
+
+``spawn f(args)`` starts a call of the function ``f`` and returns a handle at once;
+``join(handle)`` waits for the call and returns its result. A :class:`WorkerPool`
+runs the calls in worker processes, so CPU-bound work uses every core. Each worker
+parses the program once when it starts and declares its top-level functions and
+imports, after those of the snapshot the program was started from, if any; a call
+only sends the function name and the argument values.
+
+A spawned call behaves the same wherever it runs:
+
+* it sees its arguments, the program's functions and its imports (including
+  those restored from a snapshot), but no variables of the spawning code (which
+  lives in another process);
+* it cannot read input;
+* what it prints is written when it is first joined, so the output order depends
+  only on the order of the joins;
+* an error is raised again by ``join``, after the output printed before it.
+
+:class:`SerialPool` runs the calls in the same process with the same rules, for
+the REPL, watch mode and tests.
+"""
+
+import contextlib
+import functools
+import io
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .frontend import parse
+from .inference import infer_types
+from .interpreter import Generator, Interpreter
+from .nodes import FuncDeclNode, ImportNode
+from .optimizer import optimize
+from .snapshot import load_snapshot
+from .tiering import Tier
+
+
+class Handle:
+    def __init__(self, number, name, future):
+        """
+        Initializes a new Handle, the value of a ``spawn`` expression.
+
+        :param number: The number of the call, counting from 1 in spawn order.
+        :param name: The name of the function called.
+        :param future: The Future of the call's ``(output, error, value)``.
+        """
+        self.number = number
+        self.name = name
+        self.future = future
+        self.joined = False
+
+    def __str__(self):
+        return f"<task {self.number}: {self.name}>"
+
+
+def _kind(value):
+    """Names the values that cannot leave their process, or returns None."""
+    if isinstance(value, Handle):
+        return "task handle"
+    if isinstance(value, Generator):
+        return "generator"
+    return None
+
+
+def _check_args(name, args):
+    """Rejects handles and generators as arguments, see :func:`_kind`."""
+    for arg in args:
+        kind = _kind(arg)
+        if kind:
+            raise TypeError(f"Cannot pass a {kind} to spawned function '{name}'")
+
+
+@contextlib.contextmanager
+def captured_io():
+    """
+    Captures what is printed, and makes ``input()`` see the end of the input.
+
+    :return: A context manager giving the StringIO the output is written to.
+    """
+    out = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            yield out
+    finally:
+        sys.stdin = stdin
+
+
+def run_call(interp, name, args):
+    """
+    Runs a spawned call in an Interpreter, capturing what it prints.
+
+    The call runs in a new scope below the Interpreter's global environment, so
+    calls do not see each other's variables.
+
+    :param interp: The Interpreter holding the program's functions.
+    :param name: The name of the function.
+    :param args: The argument values.
+    :return: An ``(output, error, value)`` tuple; ``error`` is the exception the
+             call raised, or None.
+    """
+    with captured_io() as out:
+        try:
+            value = interp.call(name, args)
+            kind = _kind(value)
+            if kind:
+                raise TypeError(f"Spawned function '{name}' cannot return a {kind}")
+        except Exception as e:  # pylint: disable=W0718
+            return out.getvalue(), e, None
+    return out.getvalue(), None, value
+
+
+def join_handle(interp, handle):
+    """
+    Waits for a spawned call, writes its output the first time, and returns its value.
+
+    :param interp: The Interpreter running the ``join``.
+    :param handle: The Handle of the call.
+    :return: The value the call returned.
+    :raises TypeError: If ``handle`` is not a Handle.
+    :raises Exception: The error the call raised, if any.
+    """
+    if not isinstance(handle, Handle):
+        raise TypeError(f"join expects a task handle, got {type(handle).__name__}")
+    output, error, value = handle.future.result()
+    if not handle.joined:
+        handle.joined = True
+        interp.write(output)
+    if error is not None:
+        raise error
+    return value
+
+
+class SerialPool:
+    def __init__(self):
+        """Initializes a new SerialPool, which runs spawned calls immediately."""
+        self.spawned = 0
+
+    def spawn(self, interp, name, args):
+        """
+        Runs a call now, in a copy of the spawning Interpreter's functions and imports.
+
+        :param interp: The Interpreter running the ``spawn``.
+        :param name: The name of the function.
+        :param args: The argument values.
+        :return: The Handle of the call.
+        """
+        _check_args(name, args)
+        worker = Interpreter(
+            base_dir=interp.base_dir,
+            modules=interp.modules,
+            tier=interp.tier,
+            pool=self,
+        )
+        worker.global_env.funcs = dict(interp.global_env.funcs)
+        for module in interp.global_env.imports:
+            worker.global_env.add_import(module)
+        future = Future()
+        future.set_result(run_call(worker, name, args))
+        self.spawned += 1
+        return Handle(self.spawned, name, future)
+
+    def join(self, interp, handle):
+        """Returns the result of a spawned call, see :func:`join_handle`."""
+        return join_handle(interp, handle)
+
+    def close(self):
+        """Does nothing; for symmetry with :class:`WorkerPool`."""
+
+
+# The Interpreter of a worker process, set up by _init_worker.
+_WORKER = None
+
+
+# pylint: disable=R0913
+def _init_worker(source, backend, optimized, base_dir, threshold, *, snapshot=None):
+    """
+    Parses the program in a new worker process and declares its functions.
+
+    The functions and imports of the snapshot are declared first, as the main
+    Interpreter restores it before running the program; its variables are left out.
+    """
+    global _WORKER  # pylint: disable=W0603
+    tree = parse(source, backend=backend)
+    tier = Tier(threshold) if threshold is not None else None
+    interp = Interpreter(base_dir=base_dir, tier=tier, pool=SerialPool())
+    if snapshot is not None:
+        restored = Interpreter(base_dir=base_dir, modules=interp.modules)
+        load_snapshot(restored, snapshot)
+        interp.global_env.funcs.update(restored.global_env.funcs)
+        for module in restored.global_env.imports:
+            interp.global_env.add_import(module)
+    if optimized:
+        infer_types(tree, interp.global_env.funcs.values())
+        tree = optimize(tree)
+    for stmt in tree.statements:
+        if isinstance(stmt, (FuncDeclNode, ImportNode)):
+            interp.visit(stmt)
+    _WORKER = interp
+
+
+# pylint: enable=R0913
+
+
+def _run_task(name, args):
+    """Runs a spawned call in a worker process, see :func:`run_call`."""
+    return run_call(_WORKER, name, args)
+
+
+class WorkerPool:
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        source,
+        backend="yacc",
+        optimized=False,
+        base_dir=None,
+        *,
+        workers=None,
+        tier=None,
+        snapshot=None,
+    ):
+        """
+        Initializes a new WorkerPool. The worker processes start on the first spawn.
+
+        :param source: The program source, which every worker parses.
+        :param backend: The parser backend to use, either "yacc" or "pratt".
+        :param optimized: Whether to apply the loop optimizations in
+                          :mod:`common.optimizer`.
+        :param base_dir: The directory that import paths are relative to.
+        :param workers: The number of worker processes, defaults to the CPU count.
+        :param tier: The :class:`common.tiering.Tier` of the main Interpreter; workers
+                     compile hot code with the same threshold. None to only tree-walk.
+        :param snapshot: The snapshot file the main Interpreter was restored from,
+                         whose functions and imports every worker declares, or None.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.spawned = 0
+        threshold = tier.threshold if tier is not None else None
+        self._init_args = (source, backend, optimized, base_dir, threshold)
+        self._snapshot = snapshot
+        self._executor = None
+
+    # pylint: enable=R0913
+
+    def spawn(self, _interp, name, args):
+        """
+        Sends a call to the workers.
+
+        :param _interp: The Interpreter running the ``spawn``.
+        :param name: The name of the function.
+        :param args: The argument values.
+        :return: The Handle of the call.
+        """
+        _check_args(name, args)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.workers,
+                initializer=functools.partial(_init_worker, snapshot=self._snapshot),
+                initargs=self._init_args,
+            )
+        self.spawned += 1
+        return Handle(self.spawned, name, self._executor.submit(_run_task, name, args))
+
+    def join(self, interp, handle):
+        """Waits for a spawned call and returns its result, see :func:`join_handle`."""
+        return join_handle(interp, handle)
+
+    def close(self):
+        """Stops the workers, dropping the calls that were never joined."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -3,7 +3,7 @@
 from ply import yacc
 
 from .lexer import tokens  # pylint: disable=W0611
-from .nodes import *
+from .nodes import *  # pylint: disable=W0614
 
 precedence = (
     ("left", "OR"),
@@ -17,6 +17,9 @@ precedence = (
 
 _PARSER_DATA = ""
 
+# Unexpected tokens of the last parse, None for the end of input.
+syntax_errors = []
+
 
 def _find_column(input_data, lexpos):
     """
@@ -82,6 +85,31 @@ def p_statement_while(p):
     p[0] = WhileNode(p[3], BlockNode(p[6]))
 
 
+def p_statement_for(p):
+    "statement : FOR LPAREN IDENTIFIER IN for_range RPAREN LBRACE statement_list RBRACE"
+    start, end, step = p[5]
+    p[0] = ForNode(p[3], start, end, step, BlockNode(p[8]))
+
+
+def p_statement_for_each(p):
+    "statement : FOR LPAREN IDENTIFIER IN expression RPAREN LBRACE statement_list RBRACE"
+    p[0] = ForEachNode(p[3], p[5], BlockNode(p[8]))
+
+
+def p_for_range(p):
+    "for_range : expression DOTDOT expression"
+    p[0] = (p[1], p[3], None)
+
+
+def p_for_range_step(p):
+    "for_range : expression DOTDOT expression IDENTIFIER expression"
+    # "step" is not reserved, so that it can still name variables and functions.
+    if p[4] != "step":
+        p_error(p.slice[4])
+        raise SyntaxError
+    p[0] = (p[1], p[3], p[5])
+
+
 def p_statement_func_decl(p):
     "statement : FUNC IDENTIFIER LPAREN parameters RPAREN LBRACE statement_list RBRACE"
     p[0] = FuncDeclNode(p[2], p[4], p[7])
@@ -117,6 +145,21 @@ def p_expression_input(p):
     p[0] = InputNode(p[3])
 
 
+def p_expression_spawn(p):
+    "expression : SPAWN func_call"
+    p[0] = SpawnNode(p[2])
+
+
+def p_expression_join(p):
+    "expression : JOIN LPAREN expression RPAREN"
+    p[0] = JoinNode(p[3])
+
+
+def p_statement_join(p):
+    "statement : JOIN LPAREN expression RPAREN SEMI"
+    p[0] = JoinNode(p[3])
+
+
 def p_arguments(p):
     "arguments : expression"
     p[0] = [p[1]]
@@ -142,6 +185,26 @@ def p_statement_input(p):
     p[0] = InputNode(p[3])
 
 
+def p_statement_return(p):
+    "statement : RETURN expression SEMI"
+    p[0] = ReturnNode(p[2])
+
+
+def p_statement_return_empty(p):
+    "statement : RETURN SEMI"
+    p[0] = ReturnNode(None)
+
+
+def p_statement_yield(p):
+    "statement : YIELD expression SEMI"
+    p[0] = YieldNode(p[2])
+
+
+def p_statement_import(p):
+    "statement : IMPORT STRING SEMI"
+    p[0] = ImportNode(p[2])
+
+
 def p_expression_binop(p):
     """expression : expression PLUS expression
     | expression MINUS expression
@@ -189,23 +252,32 @@ def p_expression_func_call(p):
     p[0] = p[1]
 
 
-def p_error(p):
+def report_syntax_error(input_data, p):
     """
-    Handle syntax errors.
+    Print a syntax error for the unexpected token ``p`` in ``input_data``.
 
-    When a syntax error is encountered, print an error message with line and column information
-    and a marker pointing to the location of the error.
+    The message has line and column information and a marker pointing to the location
+    of the error. If the error is at the end of the file (i.e. p is None), a different
+    message is printed.
 
-    If the error is at the end of the file (i.e. p is None), print a different message.
+    :param input_data: The source being parsed, a string or bytes-like object.
+    :param p: The unexpected token, or None at the end of the input.
     """
     if p:
-        col = _find_column(_PARSER_DATA, p.lexpos)
+        data = input_data
+        if not isinstance(data, str):
+            # Bytes-like input (e.g. an mmap from common.fastlexer.load_source).
+            data = input_data[:].decode("utf-8", "replace")
+            pos = len(input_data[: p.lexpos].decode("utf-8", "replace"))
+        else:
+            pos = p.lexpos
+        col = _find_column(data, pos)
         line = p.lineno
-        start = _PARSER_DATA.rfind("\n", 0, p.lexpos) + 1
-        end = _PARSER_DATA.find("\n", p.lexpos)
+        start = data.rfind("\n", 0, pos) + 1
+        end = data.find("\n", pos)
         if end < 0:
-            end = len(_PARSER_DATA)
-        err_line = _PARSER_DATA[start:end]
+            end = len(data)
+        err_line = data[start:end]
         marker = " " * (col - 1) + "^"
         print(
             f"Syntax error at line {line}, column {col}:"
@@ -217,7 +289,20 @@ def p_error(p):
         print("Syntax error at EOF")
 
 
-parser = yacc.yacc()
+def p_error(p):
+    """
+    Handle syntax errors.
+
+    When a syntax error is encountered, print an error message with line and column information
+    and a marker pointing to the location of the error.
+
+    If the error is at the end of the file (i.e. p is None), print a different message.
+    """
+    syntax_errors.append(p)
+    report_syntax_error(_PARSER_DATA, p)
+
+
+parser = yacc.yacc(write_tables=False, debug=False)
 
 
 def parse(input_data, **kwargs):
@@ -226,7 +311,7 @@ def parse(input_data, **kwargs):
 
     This function takes in input data and arbitrary keyword arguments and passes them to the
     generated parser. The input data is stored in the global variable `_parser_data` for use by
-    the `p_error` function when reporting syntax errors.
+    the `p_error` function when reporting syntax errors, which are collected in `syntax_errors`.
 
     :param input_data: The input data to be parsed.
     :param kwargs: Additional keyword arguments to pass to the parser.
@@ -234,4 +319,5 @@ def parse(input_data, **kwargs):
     """
     global _PARSER_DATA
     _PARSER_DATA = input_data
+    syntax_errors.clear()
     return parser.parse(input_data, **kwargs)
@@ -0,0 +1,433 @@
+"""Hand-written Pratt/recursive-descent parser for the MyLang language.
+
+Accepts the same grammar as the yacc parser in :mod:`common.parser`, derives
+operator binding powers from its ``precedence`` table and builds the same
+:mod:`common.nodes` AST. Unlike yacc, it resynchronizes after a syntax error
+and keeps going, so every error in a file is reported in a single pass.
+"""
+
+import gc
+
+from .fastlexer import FastLexer
+from .nodes import (
+    AssignmentNode,
+    BinaryOpNode,
+    BlockNode,
+    ForEachNode,
+    ForNode,
+    FuncCallNode,
+    FuncDeclNode,
+    IfNode,
+    ImportNode,
+    InputNode,
+    JoinNode,
+    NumberNode,
+    PrintNode,
+    ReturnNode,
+    SpawnNode,
+    StringNode,
+    UnaryOpNode,
+    VarAccessNode,
+    VarDeclNode,
+    WhileNode,
+    YieldNode,
+)
+from .parser import precedence, report_syntax_error
+
+
+def _binding_powers(table):
+    """
+    Converts a yacc precedence table into Pratt binding powers.
+
+    :param table: A yacc ``precedence`` tuple, lowest precedence first.
+    :return: A dict mapping each token type to ``(binding_power, assoc)``.
+    """
+    powers = {}
+    for level, (assoc, *token_types) in enumerate(table, start=1):
+        for token_type in token_types:
+            powers[token_type] = (level, assoc)
+    return powers
+
+
+_POWERS = _binding_powers(precedence)
+
+_BINARY_OPS = (
+    ("PLUS", "MINUS", "MUL", "DIV")
+    + ("EQEQ", "NEQ", "LT", "LE", "GT", "GE")
+    + ("AND", "OR")
+)
+
+# Infix token type -> (binding power, minimum power for the right operand).
+_INFIX = {
+    op: (power, power if assoc == "left" else power - 1)
+    for op, (power, assoc) in _POWERS.items()
+    if op in _BINARY_OPS
+}
+
+# Tokens that can start a statement; used to resynchronize after an error.
+_STATEMENT_START = frozenset(
+    (
+        "VAR",
+        "IF",
+        "WHILE",
+        "FOR",
+        "FUNC",
+        "PRINT",
+        "INPUT",
+        "IMPORT",
+        "RETURN",
+        "YIELD",
+        "JOIN",
+    )
+)
+
+
+class _EndToken:
+    """Sentinel token returned past the end of the input."""
+
+    type = "$end"
+    value = None
+
+
+_END = _EndToken()
+
+
+class ParseError(Exception):
+    """A syntax error, raised internally to unwind to the statement level."""
+
+    def __init__(self, token):
+        """
+        Initializes a new ParseError.
+
+        :param token: The unexpected token, or None at the end of the input.
+        """
+        super().__init__(token)
+        self.token = token
+
+
+class PrattParser:
+    def __init__(self, lexer=None):
+        """
+        Initializes a new PrattParser.
+
+        :param lexer: The lexer used to tokenize the input; anything with the
+                      PLY ``input()``/``token()`` interface. Defaults to a
+                      :class:`common.fastlexer.FastLexer`.
+        """
+        self.lexer = lexer if lexer is not None else FastLexer()
+        self.errors = []  # unexpected tokens, None for the end of input
+        self._source = ""
+        self._tokens = []
+        self._types = []
+        self._pos = 0
+
+    def parse(self, input_data):
+        """
+        Parses a whole program.
+
+        Syntax errors are reported as they are found, in the same format as the
+        yacc parser, and collected in :attr:`errors`. Statements containing an
+        error are dropped from the returned tree.
+
+        :param input_data: The source to parse.
+        :return: A BlockNode with the program's statements.
+        """
+        # Tokens and AST nodes never form cycles, but allocating that many of
+        # them keeps triggering the cyclic collector; pause it while parsing.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._source = input_data
+            self.lexer.input(input_data)
+            tokens = list(iter(self.lexer.token, None))
+            # Two end sentinels, so one token of lookahead never runs off the end.
+            self._tokens = tokens + [_END, _END]
+            self._types = [tok.type for tok in tokens] + [_END.type, _END.type]
+            self._pos = 0
+            self.errors = []
+            statements = self._statement_list(top_level=True)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self._tokens = self._types = []
+        return BlockNode(statements)
+
+    # Token helpers
+
+    def _peek(self, offset=0):
+        """Returns the token ``offset`` positions ahead without consuming it."""
+        return self._tokens[self._pos + offset]
+
+    def _advance(self):
+        """Consumes and returns the current token."""
+        tok = self._tokens[self._pos]
+        self._pos += 1
+        return tok
+
+    def _expect(self, token_type):
+        """Consumes the current token, which must be of the given type."""
+        pos = self._pos
+        if self._types[pos] != token_type:
+            raise ParseError(self._tokens[pos])
+        self._pos = pos + 1
+        return self._tokens[pos]
+
+    def _error(self, exc):
+        """Reports and records a syntax error."""
+        tok = None if exc.token is _END else exc.token
+        if tok is None and self.errors and self.errors[-1] is None:
+            # Unclosed blocks all fail at EOF; report it only once.
+            return
+        self.errors.append(tok)
+        report_syntax_error(self._source, tok)
+
+    def _synchronize(self, start, top_level=False):
+        """
+        Skips tokens after an error until a likely statement boundary.
+
+        :param start: The token index where the failed statement started.
+        :param top_level: Whether the statement is outside any block. A closing brace
+                          there closes nothing, so it is skipped as part of the
+                          error instead of being reported again.
+        """
+        if self._pos == start:
+            self._pos += 1
+        while True:
+            tok = self._peek()
+            if tok is _END or tok.type in _STATEMENT_START:
+                return
+            if tok.type == "RBRACE" and not top_level:
+                return
+            self._pos += 1
+            if tok.type == "SEMI":
+                return
+
+    # Statements
+
+    def _statement_list(self, top_level=False):
+        """
+        Parses statements up to the closing brace of a block or end of input.
+
+        :param top_level: Whether a stray closing brace is an error here.
+        :return: The list of parsed statements.
+        """
+        statements = []
+        while True:
+            tok = self._peek()
+            if tok is _END or (tok.type == "RBRACE" and not top_level):
+                return statements
+            start = self._pos
+            try:
+                statements.append(self._statement())
+            except ParseError as exc:
+                self._error(exc)
+                if exc.token is _END:
+                    return statements
+                self._synchronize(start, top_level)
+
+    def _block(self):
+        """Parses ``{ statement_list }`` and returns the statement list."""
+        self._expect("LBRACE")
+        statements = self._statement_list()
+        self._expect("RBRACE")
+        return statements
+
+    # pylint: disable=R0911,R0912,R0915
+    def _statement(self):
+        """Parses a single statement."""
+        tok = self._peek()
+        kind = tok.type
+        if kind == "VAR":
+            self._advance()
+            name = self._expect("IDENTIFIER").value
+            self._expect("EQ")
+            expr = self._expression()
+            self._expect("SEMI")
+            return VarDeclNode(name, expr)
+        if kind == "IDENTIFIER":
+            if self._types[self._pos + 1] == "EQ":
+                self._pos += 2
+                expr = self._expression()
+                self._expect("SEMI")
+                return AssignmentNode(tok.value, expr)
+            call = self._func_call()
+            self._expect("SEMI")
+            return call
+        if kind == "IF":
+            self._advance()
+            cond = self._condition()
+            then_block = BlockNode(self._block())
+            else_block = None
+            if self._types[self._pos] == "ELSE":
+                self._advance()
+                else_block = BlockNode(self._block())
+            return IfNode(cond, then_block, else_block)
+        if kind == "WHILE":
+            self._advance()
+            cond = self._condition()
+            return WhileNode(cond, BlockNode(self._block()))
+        if kind == "FOR":
+            return self._for()
+        if kind == "FUNC":
+            self._advance()
+            name = self._expect("IDENTIFIER").value
+            self._expect("LPAREN")
+            params = self._parameters()
+            self._expect("RPAREN")
+            return FuncDeclNode(name, params, self._block())
+        if kind == "PRINT":
+            self._advance()
+            expr = self._condition()
+            self._expect("SEMI")
+            return PrintNode(expr)
+        if kind in ("INPUT", "JOIN"):
+            node = self._prefix()
+            self._expect("SEMI")
+            return node
+        if kind == "RETURN":
+            self._advance()
+            expr = None if self._types[self._pos] == "SEMI" else self._expression()
+            self._expect("SEMI")
+            return ReturnNode(expr)
+        if kind == "YIELD":
+            self._advance()
+            expr = self._expression()
+            self._expect("SEMI")
+            return YieldNode(expr)
+        if kind == "IMPORT":
+            self._advance()
+            path = self._expect("STRING").value
+            self._expect("SEMI")
+            return ImportNode(path)
+        raise ParseError(tok)
+
+    # pylint: enable=R0911,R0912,R0915
+
+    def _for(self):
+        """
+        Parses ``for (name in start..end step step) { body }``, step optional, or
+        ``for (name in iterable) { body }``.
+        """
+        self._expect("FOR")
+        self._expect("LPAREN")
+        name = self._expect("IDENTIFIER").value
+        self._expect("IN")
+        start = self._expression()
+        if self._types[self._pos] == "RPAREN":
+            self._advance()
+            return ForEachNode(name, start, BlockNode(self._block()))
+        self._expect("DOTDOT")
+        end = self._expression()
+        step = None
+        if self._types[self._pos] == "IDENTIFIER":
+            # "step" is not a reserved word, see common.parser.
+            if self._peek().value != "step":
+                raise ParseError(self._peek())
+            self._advance()
+            step = self._expression()
+        self._expect("RPAREN")
+        return ForNode(name, start, end, step, BlockNode(self._block()))
+
+    def _condition(self):
+        """Parses a parenthesized expression."""
+        self._expect("LPAREN")
+        expr = self._expression()
+        self._expect("RPAREN")
+        return expr
+
+    def _parameters(self):
+        """Parses a possibly empty, comma-separated list of parameter names."""
+        if self._types[self._pos] != "IDENTIFIER":
+            return []
+        params = [self._advance().value]
+        while self._types[self._pos] == "COMMA":
+            self._advance()
+            params.append(self._expect("IDENTIFIER").value)
+        return params
+
+    def _func_call(self):
+        """Parses ``IDENTIFIER ( arguments )``."""
+        name = self._expect("IDENTIFIER").value
+        self._expect("LPAREN")
+        args = []
+        if self._types[self._pos] != "RPAREN":
+            args.append(self._expression())
+            while self._types[self._pos] == "COMMA":
+                self._advance()
+                args.append(self._expression())
+        self._expect("RPAREN")
+        return FuncCallNode(name, args)
+
+    def _input(self):
+        """Parses ``input ( STRING )``."""
+        self._expect("INPUT")
+        self._expect("LPAREN")
+        prompt = self._expect("STRING").value
+        self._expect("RPAREN")
+        return InputNode(prompt)
+
+    # Expressions
+
+    def _expression(self, min_power=0):
+        """
+        Parses an expression whose operators bind tighter than ``min_power``.
+
+        :param min_power: The minimum binding power of infix operators to accept.
+        :return: The expression node.
+        """
+        left = self._prefix()
+        types = self._types
+        while True:
+            infix = _INFIX.get(types[self._pos])
+            if infix is None or infix[0] <= min_power:
+                return left
+            op = self._advance().value
+            left = BinaryOpNode(left, op, self._expression(infix[1]))
+
+    # pylint: disable=R0911
+    def _prefix(self):
+        """Parses a primary expression or a prefix operator application."""
+        pos = self._pos
+        kind = self._types[pos]
+        tok = self._tokens[pos]
+        if kind == "IDENTIFIER":
+            if self._types[pos + 1] == "LPAREN":
+                return self._func_call()
+            self._pos = pos + 1
+            return VarAccessNode(tok.value)
+        if kind == "NUMBER":
+            self._pos = pos + 1
+            return NumberNode(tok.value)
+        if kind == "STRING":
+            self._pos = pos + 1
+            return StringNode(tok.value)
+        if kind == "LPAREN":
+            return self._condition()
+        if kind == "INPUT":
+            return self._input()
+        if kind == "SPAWN":
+            self._pos = pos + 1
+            return SpawnNode(self._func_call())
+        if kind == "JOIN":
+            self._pos = pos + 1
+            return JoinNode(self._condition())
+        if kind in ("NOT", "MINUS"):
+            self._pos = pos + 1
+            power, _assoc = _POWERS["UMINUS" if kind == "MINUS" else kind]
+            # Prefix operators are right-associative: their operand may itself
+            # start with an operator of the same precedence.
+            return UnaryOpNode(tok.value, self._expression(power - 1))
+        raise ParseError(tok)
+
+    # pylint: enable=R0911,R0912,R0915
+
+
+def parse(input_data, lexer=None):
+    """
+    Parse the given input data with a new PrattParser.
+
+    :param input_data: The input data to be parsed.
+    :param lexer: Optional lexer, see :class:`PrattParser`.
+    :return: The parsed program as a BlockNode.
+    """
+    return PrattParser(lexer).parse(input_data)
@@ -0,0 +1,215 @@
+"""Purity analysis and memoization of MyLang functions.
+
+:func:`mark_pure` sets ``pure`` on every FuncDeclNode whose result depends only
+on its arguments, so that a :class:`Memo` can cache its calls by argument tuple.
+A function is pure when its body:
+
+* has no ``print``, ``input``, ``import``, ``spawn``, ``join`` or ``yield``, runs
+  no ``for (x in generator)`` loop, and declares no nested functions;
+* reads and assigns only its parameters and its own ``var`` declarations (with
+  dynamic scoping, any other name is a variable of the caller);
+* calls only pure functions, each declared exactly once in the program, so that
+  the name cannot resolve to a different function depending on the caller.
+
+Recursive functions are handled by starting from every candidate and removing
+impure ones until nothing changes. A call to a function outside the program (for
+example from an imported module) is only found at run time; a memoized call
+that makes one is not cached.
+"""
+
+from collections import OrderedDict
+
+from .nodes import (
+    AssignmentNode,
+    BlockNode,
+    ForEachNode,
+    ForNode,
+    FuncCallNode,
+    FuncDeclNode,
+    ImportNode,
+    InputNode,
+    JoinNode,
+    PrintNode,
+    SpawnNode,
+    VarAccessNode,
+    VarDeclNode,
+    YieldNode,
+    iter_child_nodes,
+    walk,
+)
+
+DEFAULT_SIZE = 4096
+
+_CONSTANT_NAMES = frozenset(("true", "false"))
+_IMPURE_NODES = (
+    PrintNode,
+    InputNode,
+    ImportNode,
+    FuncDeclNode,
+    SpawnNode,
+    JoinNode,
+    YieldNode,
+    ForEachNode,
+)
+
+
+class _Impure(Exception):
+    """Raised by the body check on the first impure construct."""
+
+
+def _check(node, scopes, calls):
+    """
+    Checks that a node only touches local names and records the functions it calls.
+
+    :param node: The node to check.
+    :param scopes: The names declared so far, one set per enclosing block.
+    :param calls: The set the names of called functions are added to.
+    :raises _Impure: If the node is impure.
+    """
+    if isinstance(node, _IMPURE_NODES):
+        raise _Impure()
+    if isinstance(node, BlockNode):
+        scopes.append(set())
+        for stmt in node.statements:
+            _check(stmt, scopes, calls)
+        scopes.pop()
+        return
+    if isinstance(node, ForNode):
+        for child in filter(None, (node.start, node.end, node.step)):
+            _check(child, scopes, calls)
+        scopes.append({node.name})
+        _check(node.body, scopes, calls)
+        scopes.pop()
+        return
+    if isinstance(node, VarDeclNode):
+        if node.expr is not None:
+            _check(node.expr, scopes, calls)
+        scopes[-1].add(node.name)
+        return
+    if isinstance(node, (AssignmentNode, VarAccessNode)):
+        name = node.name
+        if name not in _CONSTANT_NAMES and not any(name in s for s in scopes):
+            raise _Impure()
+    elif isinstance(node, FuncCallNode):
+        if node.name in ("print", "input"):
+            raise _Impure()
+        calls.add(node.name)
+    for child in iter_child_nodes(node):
+        _check(child, scopes, calls)
+
+
+def _body_calls(func):
+    """
+    Checks a function body on its own, assuming that the functions it calls are pure.
+
+    :param func: The FuncDeclNode.
+    :return: The names of the functions it calls, or None if it is impure.
+    """
+    calls = set()
+    scopes = [set(func.params)]
+    try:
+        for stmt in func.body:
+            _check(stmt, scopes, calls)
+    except _Impure:
+        return None
+    return calls
+
+
+def mark_pure(tree):
+    """
+    Sets ``pure`` on every function declared in a program.
+
+    :param tree: The root of the AST, usually the program's BlockNode.
+    :return: The names of the pure functions.
+    """
+    funcs = [node for node in walk(tree) if isinstance(node, FuncDeclNode)]
+    declarations = {}
+    for func in funcs:
+        declarations[func.name] = declarations.get(func.name, 0) + 1
+    candidates = {}
+    for func in funcs:
+        func.pure = False
+        if declarations[func.name] == 1:
+            calls = _body_calls(func)
+            if calls is not None:
+                candidates[func.name] = (func, calls)
+    changed = True
+    while changed:
+        changed = False
+        for name, (_func, calls) in list(candidates.items()):
+            if not calls <= candidates.keys():
+                del candidates[name]
+                changed = True
+    for func, _calls in candidates.values():
+        func.pure = True
+    return sorted(candidates)
+
+
+class Memo:
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Initializes a new Memo, an LRU cache of pure function results.
+
+        :param size: The maximum number of results kept.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+        self._depth = 0  # memoized calls in progress
+        self._tainted = False  # whether one of them called an impure function
+
+    def call(self, func, args, run):
+        """
+        Returns the result of a pure function call, from the cache if possible.
+
+        :param func: The FuncDeclNode of the pure function.
+        :param args: The argument values.
+        :param run: A callable running the call, used on a cache miss.
+        :return: The result of the call.
+        """
+        # Values that compare equal can behave differently (1, 1.0 and true print
+        # and concatenate differently), so the types are part of the key.
+        key = (func, args, tuple(map(type, args)))
+        cache = self._cache
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        self._depth += 1
+        try:
+            result = run()
+        finally:
+            self._depth -= 1
+        if self._tainted:
+            self._tainted = self._depth > 0
+            return result
+        cache[key] = result
+        if len(cache) > self.size:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def impure_call(self):
+        """Records that an impure function was called, see :meth:`call`."""
+        if self._depth:
+            self._tainted = True
+
+    def clear(self):
+        """Forgets every cached result."""
+        self._cache.clear()
+
+    def report(self):
+        """
+        Summarizes the cache statistics.
+
+        :return: The report.
+        """
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return (
+            f"Memoization: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate),"
+            f" {len(self._cache)}/{self.size} results cached, {self.evictions} evicted"
+        )
@@ -0,0 +1,268 @@
+"""Rules-engine mode: one MyLang program run once per input record.
+
+A :class:`RuleEngine` parses a program once and declares its top-level functions
+and imports in a template environment. Each record then runs the program's other
+top-level statements in a fresh global environment whose variables are the
+record's fields and whose parent is the template, so setting up a record costs
+one Environment, whatever the size of the program. With a tier, the per-record
+statements are compiled to Python up front, and hot functions and loops stay
+compiled across records.
+
+Records come from a JSON Lines file (one object per line) or a CSV file with a
+header row; :func:`process` runs them, optionally sharded across worker
+processes, and yields one result per record, in input order.
+"""
+
+import csv
+import json
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .frontend import parse_checked
+from .inference import infer_types
+from .interpreter import Environment, Interpreter, ReturnSignal
+from .nodes import BlockNode, FuncDeclNode, ImportNode
+from .optimizer import optimize
+from .parallel import SerialPool, captured_io
+from .tiering import Tier, translate_function
+
+FORMATS = ("jsonl", "csv")
+BATCH_SIZE = 500
+
+_FIELD_TYPES = (str, int, float, bool, type(None))
+_INT = re.compile(r"[+-]?\d+\Z")
+_FLOAT = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?\Z")
+
+
+def _csv_value(text):
+    """Converts a CSV field to a number if it is written as one."""
+    if _INT.match(text):
+        return int(text)
+    if _FLOAT.match(text):
+        return float(text)
+    return text
+
+
+def read_records(path, fmt=None):
+    """
+    Reads the records of a JSON Lines or CSV file, one at a time.
+
+    CSV fields that are written as numbers become numbers; all other fields are
+    strings. Blank JSON Lines are skipped.
+
+    :param path: The file to read.
+    :param fmt: "jsonl" or "csv", defaults to the file's extension (".csv" for CSV).
+    :return: An iterator of dicts, from field name to value.
+    :raises ValueError: If a JSON line is not an object.
+    """
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield {name: _csv_value(value) for name, value in row.items()}
+            return
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{number}: a record must be a JSON object")
+            yield record
+
+
+class RuleEngine:
+    def __init__(self, tree, base_dir=None, tier=None):
+        """
+        Initializes a new RuleEngine, declaring the program's functions and imports.
+
+        The functions and imports must come before the other top-level statements,
+        so that declaring them first does not change the order the program runs in.
+
+        :param tree: The parsed program.
+        :param base_dir: The directory that import paths are relative to.
+        :param tier: The :class:`common.tiering.Tier` compiling hot code, or None.
+        :raises ValueError: If a function or import follows another statement.
+        """
+        self.interp = Interpreter(base_dir=base_dir, tier=tier, pool=SerialPool())
+        self.template = self.interp.global_env
+        body = []
+        for stmt in tree.statements:
+            if isinstance(stmt, (FuncDeclNode, ImportNode)):
+                if body:
+                    kind = "function" if isinstance(stmt, FuncDeclNode) else "import"
+                    raise ValueError(
+                        f"A rule's functions and imports come before its other"
+                        f" statements, but a {kind} follows them"
+                    )
+                self.interp.visit(stmt, self.template)
+            else:
+                body.append(stmt)
+        self.body = BlockNode(body)
+        # The statements run for every record, so they are hot from the start.
+        self.compiled = None
+        if tier is not None:
+            try:
+                self.compiled = translate_function(FuncDeclNode("<record>", [], body))
+            except (SyntaxError, RecursionError, MemoryError):
+                pass  # too deeply nested for Python's compiler: tree-walk it
+
+    def run(self, fields):
+        """
+        Runs the program for one record.
+
+        A top-level ``return`` ends the record early, with the value returned as its
+        result.
+
+        :param fields: The record, a dict from field name to value. It becomes the
+                       variables of the record's global environment.
+        :return: A dict with the ``output`` the program printed, the ``result`` of its
+                 last statement and the ``error`` it raised, as text, or None.
+        """
+        for name, value in fields.items():
+            if not isinstance(value, _FIELD_TYPES):
+                return {
+                    "output": "",
+                    "result": None,
+                    "error": f"TypeError: field '{name}' is not a number, string,"
+                    " boolean or null",
+                }
+        env = Environment(self.template)
+        env.vars = dict(fields)
+        with captured_io() as out:
+            try:
+                if self.compiled:
+                    result = self.compiled(self.interp, env)
+                else:
+                    result = self.interp.visit(self.body, env)
+            except ReturnSignal as signal:
+                result = signal.value
+            except Exception as e:  # pylint: disable=W0718
+                return {
+                    "output": out.getvalue(),
+                    "result": None,
+                    "error": f"{type(e).__name__}: {e}",
+                }
+        if not isinstance(result, _FIELD_TYPES):
+            result = str(result)
+        return {"output": out.getvalue(), "result": result, "error": None}
+
+
+def _batches(records, size):
+    """Groups an iterator of records into lists of up to ``size`` records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# The RuleEngine of a worker process, set up by _init_worker.
+_ENGINE = None
+
+
+def _init_worker(source, backend, optimized, base_dir, threshold):
+    """Parses the program in a new worker process and builds its RuleEngine."""
+    global _ENGINE  # pylint: disable=W0603
+    _ENGINE = RuleEngine(
+        build_tree(source, backend, optimized),
+        base_dir=base_dir,
+        tier=Tier(threshold) if threshold is not None else None,
+    )
+
+
+def _run_batch(batch):
+    """Runs a batch of records in a worker process."""
+    return [_ENGINE.run(fields) for fields in batch]
+
+
+def build_tree(source, backend="yacc", optimized=False):
+    """
+    Parses a rules program.
+
+    :param source: The program source.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param optimized: Whether to apply the loop optimizations in
+                      :mod:`common.optimizer` and :mod:`common.inference`.
+    :return: The parsed program.
+    :raises SyntaxError: If the program has errors, which are reported as usual.
+    """
+    tree, errors = parse_checked(source, backend=backend)
+    if errors:
+        raise SyntaxError(f"{errors} syntax error(s) in the rules program")
+    if not optimized:
+        return tree
+    infer_types(tree)
+    return optimize(tree)
+
+
+# pylint: disable=R0913
+def process(
+    source,
+    records,
+    backend="yacc",
+    optimized=False,
+    base_dir=None,
+    *,
+    tier=None,
+    shards=1,
+):
+    """
+    Runs a program once per record.
+
+    :param source: The program source.
+    :param records: An iterable of records, see :meth:`RuleEngine.run`.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param optimized: Whether to apply the loop optimizations in
+                      :mod:`common.optimizer`.
+    :param base_dir: The directory that import paths are relative to.
+    :param tier: The :class:`common.tiering.Tier` compiling hot code, or None. Shards
+                 compile with the same threshold.
+    :param shards: The number of worker processes to spread the records over; 1
+                   runs them in this process.
+    :return: An iterator of results, see :meth:`RuleEngine.run`, in record order.
+    """
+    tree = build_tree(source, backend, optimized)
+    if shards <= 1:
+        engine = RuleEngine(tree, base_dir, tier)
+        for fields in records:
+            yield engine.run(fields)
+        return
+    threshold = tier.threshold if tier is not None else None
+    with ProcessPoolExecutor(
+        shards,
+        initializer=_init_worker,
+        initargs=(source, backend, optimized, base_dir, threshold),
+    ) as executor:
+        # Keep a few batches per shard in flight, so that the records are read as
+        # they are needed rather than all at once.
+        pending = deque()
+        for batch in _batches(records, BATCH_SIZE):
+            pending.append(executor.submit(_run_batch, batch))
+            if len(pending) > 2 * shards:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# pylint: enable=R0913
+
+
+def write_results(results, stream):
+    """
+    Writes results as JSON Lines, numbering the records from 1.
+
+    :param results: An iterable of results, see :meth:`RuleEngine.run`.
+    :param stream: The text stream to write to.
+    :return: A ``(records, errors)`` tuple counting what was written.
+    """
+    count = errors = 0
+    for count, result in enumerate(results, start=1):
+        errors += result["error"] is not None
+        line = json.dumps({"record": count, **result}, ensure_ascii=False)
+        stream.write(line + "\n")
+    return count, errors
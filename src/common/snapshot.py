@@ -0,0 +1,259 @@
+"""Snapshots of an Interpreter's global environment.
+
+A snapshot holds the global variables, the functions (as syntax trees) and the
+imported modules of an Interpreter, so that a later run can restore them instead
+of running its setup code again. The file starts with a magic string and a format
+version, followed by zlib-compressed JSON:
+
+* ``types``: the names of the node classes used, so nodes can refer to them by
+  index. A node is a list ``[type_index, field...]`` in ``_fields`` order; any
+  other list is a plain list.
+* ``vars``: the global variables, which must be numbers, strings, booleans or None.
+* ``funcs``: the global functions, as nodes.
+* ``imports``: the absolute paths of the imported modules.
+
+Everything is validated on load, and the file is never executed.
+"""
+
+import gc
+import json
+import struct
+import zlib
+
+from .nodes import (
+    AssignmentNode,
+    BinaryOpNode,
+    BlockNode,
+    CountedLoopNode,
+    ForEachNode,
+    ForNode,
+    FuncCallNode,
+    FuncDeclNode,
+    HoistedLoopNode,
+    HoistedNode,
+    IfNode,
+    ImportNode,
+    InputNode,
+    JoinNode,
+    NumberNode,
+    PrintNode,
+    ReturnNode,
+    SpawnNode,
+    StringNode,
+    UnaryOpNode,
+    VarAccessNode,
+    VarDeclNode,
+    WhileNode,
+    YieldNode,
+)
+
+MAGIC = b"MYLSNAP\0"
+VERSION = 1
+
+_HEADER = struct.Struct(">8sH")
+_SCALARS = (str, int, float, bool, type(None))
+_SCALAR_TYPES = frozenset(_SCALARS)
+_KEYS = frozenset(("types", "vars", "funcs", "imports"))
+# The node classes a snapshot may contain.
+_NODE_TYPES = {
+    cls.__name__: cls
+    for cls in (
+        AssignmentNode,
+        BinaryOpNode,
+        BlockNode,
+        CountedLoopNode,
+        ForEachNode,
+        ForNode,
+        FuncCallNode,
+        FuncDeclNode,
+        HoistedLoopNode,
+        HoistedNode,
+        IfNode,
+        ImportNode,
+        InputNode,
+        JoinNode,
+        NumberNode,
+        PrintNode,
+        ReturnNode,
+        SpawnNode,
+        StringNode,
+        UnaryOpNode,
+        VarAccessNode,
+        VarDeclNode,
+        WhileNode,
+        YieldNode,
+    )
+}
+
+
+class _Encoder:
+    """Converts nodes to JSON-compatible lists."""
+
+    def __init__(self):
+        self.types = []
+        self._codes = {}
+
+    def node(self, node):
+        """Encodes a node and everything below it."""
+        name = type(node).__name__
+        if _NODE_TYPES.get(name) is not type(node):
+            raise TypeError(f"Cannot snapshot node of type {name}")
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.types)
+            self.types.append(name)
+        return [code] + [self.value(getattr(node, field)) for field in node._fields]
+
+    def value(self, value):
+        """Encodes a field value."""
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        if hasattr(value, "_fields"):
+            return self.node(value)
+        if isinstance(value, _SCALARS):
+            return value
+        raise TypeError(f"Cannot snapshot value of type {type(value).__name__}")
+
+
+def save_snapshot(interp, path):
+    """
+    Writes a snapshot of an Interpreter's global environment to a file.
+
+    :param interp: The Interpreter.
+    :param path: The file to write.
+    :raises TypeError: If a global variable holds a value that cannot be saved.
+    """
+    env = interp.global_env
+    encoder = _Encoder()
+    for name, value in env.vars.items():
+        if not isinstance(value, _SCALARS):
+            raise TypeError(
+                f"Cannot snapshot variable '{name}' of type {type(value).__name__}"
+            )
+    payload = {
+        "vars": env.vars,
+        "funcs": {name: encoder.node(func) for name, func in env.funcs.items()},
+        "imports": [module.path for module in env.imports],
+    }
+    payload["types"] = encoder.types
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION))
+        f.write(zlib.compress(data))
+
+
+class _Decoder:
+    """Rebuilds nodes from their JSON form, validating them."""
+
+    def __init__(self, types):
+        if not isinstance(types, list):
+            raise ValueError("Invalid snapshot: bad type table")
+        self.types = []
+        for name in types:
+            if name not in _NODE_TYPES:
+                raise ValueError(f"Invalid snapshot: unknown node type {name!r}")
+            cls = _NODE_TYPES[name]
+            self.types.append((cls, len(cls._fields) + 1))
+
+    def node(self, data):
+        """Decodes a node and everything below it."""
+        if not (data.__class__ is list and data and data[0].__class__ is int):
+            raise ValueError("Invalid snapshot: expected a node")
+        if not 0 <= data[0] < len(self.types):
+            raise ValueError("Invalid snapshot: bad node type")
+        cls, size = self.types[data[0]]
+        if len(data) != size:
+            raise ValueError(f"Invalid snapshot: bad fields for {cls.__name__}")
+        args = []
+        for item in data[1:]:
+            if item.__class__ is list:
+                args.append(self.value(item))
+            elif item.__class__ in _SCALAR_TYPES:
+                args.append(item)
+            else:
+                raise ValueError("Invalid snapshot: unexpected value")
+        return cls(*args)
+
+    def value(self, data):
+        """Decodes a field value."""
+        if data.__class__ is list:
+            if data and data[0].__class__ is int:
+                return self.node(data)
+            return [self.value(item) for item in data]
+        if data.__class__ in _SCALAR_TYPES:
+            return data
+        raise ValueError("Invalid snapshot: unexpected value")
+
+
+def _read_payload(path):
+    """Reads, checks and decompresses a snapshot file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"Invalid snapshot '{path}': file is truncated")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid snapshot '{path}': not a snapshot file")
+    if version != VERSION:
+        raise ValueError(
+            f"Unsupported snapshot version {version} in '{path}' (expected {VERSION})"
+        )
+    try:
+        payload = json.loads(zlib.decompress(data[_HEADER.size :]))
+    except (zlib.error, ValueError) as e:
+        raise ValueError(f"Invalid snapshot '{path}': {e}") from e
+    if not isinstance(payload, dict) or set(payload) != _KEYS:
+        raise ValueError(f"Invalid snapshot '{path}': bad layout")
+    return payload
+
+
+def _decode_funcs(path, payload):
+    """Decodes and checks the function table of a snapshot."""
+    if not isinstance(payload["funcs"], dict):
+        raise ValueError(f"Invalid snapshot '{path}': bad layout")
+    decoder = _Decoder(payload["types"])
+    funcs = {}
+    for name, data in payload["funcs"].items():
+        func = decoder.node(data)
+        if not isinstance(func, FuncDeclNode):
+            raise ValueError(f"Invalid snapshot '{path}': '{name}' is not a function")
+        funcs[name] = func
+    return funcs
+
+
+def load_snapshot(interp, path):
+    """
+    Restores a snapshot into an Interpreter's global environment.
+
+    The snapshot is decoded and validated completely before the environment is
+    changed. Imported modules are looked up again in the Interpreter's module cache.
+
+    :param interp: The Interpreter.
+    :param path: The snapshot file.
+    :raises ValueError: If the file is not a valid snapshot of this version.
+    :raises ImportError: If an imported module cannot be read.
+    """
+    # Like parsing, decoding allocates many objects that never form cycles;
+    # pause the cyclic collector meanwhile.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        payload = _read_payload(path)
+        funcs = _decode_funcs(path, payload)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    variables, imports = payload["vars"], payload["imports"]
+    if not isinstance(variables, dict):
+        raise ValueError(f"Invalid snapshot '{path}': bad layout")
+    if not all(isinstance(value, _SCALARS) for value in variables.values()):
+        raise ValueError(f"Invalid snapshot '{path}': bad variable value")
+    if not (isinstance(imports, list) and all(isinstance(p, str) for p in imports)):
+        raise ValueError(f"Invalid snapshot '{path}': bad import list")
+    modules = [interp.modules.get(module_path) for module_path in imports]
+
+    env = interp.global_env
+    env.vars.update(variables)
+    env.funcs.update(funcs)
+    for module in modules:
+        env.add_import(module)
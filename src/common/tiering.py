@@ -0,0 +1,467 @@
+"""Tiered execution for the MyLang interpreter.
+
+Every FuncDeclNode counts its calls and every WhileNode, ForNode and ForEachNode
+the iterations the interpreter runs. Once a count reaches the tier's threshold, the function body or
+loop is translated to Python source, compiled with :func:`compile` and stored on
+the node, and the interpreter runs the compiled code from then on. A hot loop
+switches over mid-run: all of its state lives in Environments (and, for a
+``for`` loop, in the iterator of its values or its generator), so the compiled loop simply carries
+on from the current iteration.
+
+The generated code keeps the interpreter's Environment chain and evaluation
+order, so it behaves exactly like tree-walking, without the per-node dispatch.
+Nodes the translator does not handle (imports, optimizer nodes, ...) are left to
+the interpreter, which the compiled code calls back into. The bodies of generator
+functions are always interpreted, since they must suspend at every ``yield``; the
+loops in them without a ``yield`` are still compiled when hot.
+"""
+
+import math
+
+from .interpreter import (
+    _NUMBERS,
+    Environment,
+    ReturnSignal,
+    _add,
+    _for_range,
+    _generator,
+    _to_number,
+)
+from .nodes import (
+    AssignmentNode,
+    BinaryOpNode,
+    ForEachNode,
+    ForNode,
+    FuncCallNode,
+    FuncDeclNode,
+    IfNode,
+    InputNode,
+    NumberNode,
+    PrintNode,
+    ReturnNode,
+    StringNode,
+    UnaryOpNode,
+    VarAccessNode,
+    VarDeclNode,
+    WhileNode,
+)
+
+DEFAULT_THRESHOLD = 100
+
+_PLAIN_OPS = frozenset(("*", "/", "==", "!=", "<", "<=", ">", ">="))
+_LOGICAL = {"and": "&", "or": "|"}
+_UNARY = {"-": "-", "not": "not ", "+": "+"}
+
+
+def _sub(left, right):
+    """Implements ``-`` like :meth:`Interpreter.visit_BinaryOpNode`."""
+    if left.__class__ in _NUMBERS and right.__class__ in _NUMBERS:
+        return left - right
+    return _to_number(left) - _to_number(right)
+
+
+def _call(interp, env, name, args):
+    """
+    Calls a function from compiled code, like :meth:`Interpreter.visit_FuncCallNode`.
+
+    :param interp: The running Interpreter.
+    :param env: The caller's environment.
+    :param name: The name of the function.
+    :param args: A callable taking the number of parameters and returning the
+                 argument values; only that many arguments are evaluated.
+    :return: The result of the call.
+    """
+    func, scope = env.find_func(name)
+    new_env = Environment(env if scope is None else scope)
+    params = func.params
+    for param, value in zip(params, args(len(params))):
+        new_env.vars[param] = value
+    return interp.run_function(func, new_env)
+
+
+def _no_args(_count):
+    """The argument callable of a call without arguments."""
+    return ()
+
+
+class _Translator:
+    """Translates statements and expressions to Python source."""
+
+    def __init__(self, function):
+        """
+        Initializes a new _Translator.
+
+        :param function: Whether the code is a function body, which ``return``
+                         leaves directly; a loop raises a ReturnSignal instead.
+        """
+        self.function = function
+        self.lines = []
+        self.nodes = []
+
+    def ref(self, node):
+        """Returns an expression referring to ``node`` from the generated code."""
+        self.nodes.append(node)
+        return f"_nodes[{len(self.nodes) - 1}]"
+
+    def fallback(self, node, env):
+        """Returns an expression that has the interpreter visit ``node``."""
+        return f"_interp.visit({self.ref(node)}, {env})"
+
+    def emit(self, indent, line):
+        """Adds a line of code at the given indentation level."""
+        self.lines.append("    " * indent + line)
+
+    def block(self, statements, depth, indent, want):
+        """
+        Translates a list of statements.
+
+        :param statements: The statements.
+        :param depth: The nesting depth of the environment they run in.
+        :param indent: The indentation level of the generated code.
+        :param want: Whether the block's result must be stored in ``_r``.
+        """
+        if not statements:
+            self.emit(indent, "_r = None" if want else "pass")
+        for index, stmt in enumerate(statements):
+            self.statement(stmt, depth, indent, want and index == len(statements) - 1)
+
+    def scope(self, block, depth, indent, want):
+        """Translates a block that runs in a new child environment."""
+        env = _env_name(depth + 1)
+        self.emit(indent, f"{env} = Environment({_env_name(depth)})")
+        self.emit(indent, f"{env}_vars = {env}.vars")
+        self.block(block.statements, depth + 1, indent, want)
+
+    def for_loop(self, loop, values, depth, indent, want):
+        """
+        Translates the iterations of a ForNode or ForEachNode, like
+        :meth:`Interpreter.visit_ForNode`.
+
+        :param loop: The ForNode or ForEachNode.
+        :param values: A Python expression giving the values of the loop variable.
+        :param depth: The nesting depth of the environment the loop runs in.
+        :param indent: The indentation level of the generated code.
+        :param want: Whether the loop's result must be stored in ``_r``.
+        """
+        env = _env_name(depth)
+        frame = _env_name(depth + 1)
+        self.emit(indent, f"{frame} = Environment({env})")
+        self.emit(indent, f"{frame}_vars = {frame}.vars")
+        self.emit(indent, f"for _v{depth} in {values}:")
+        self.emit(indent + 1, f"if {frame}.funcs or {frame}.imports:")
+        self.emit(indent + 2, f"{frame} = Environment({env})")
+        self.emit(indent + 2, f"{frame}_vars = {frame}.vars")
+        self.emit(indent + 1, "else:")
+        self.emit(indent + 2, f"{frame}_vars.clear()")
+        self.emit(indent + 1, f"{frame}_vars[{loop.name!r}] = _v{depth}")
+        self.block(loop.body.statements, depth + 1, indent + 1, want)
+
+    def loop_values(self, loop, env):
+        """Translates the values of a ForNode or ForEachNode, see :meth:`for_loop`."""
+        if isinstance(loop, ForEachNode):
+            return f"_generator({self.expr(loop.iterable, env)})"
+        start = self.expr(loop.start, env)
+        end = self.expr(loop.end, env)
+        step = "1" if loop.step is None else self.expr(loop.step, env)
+        return f"_for_range({start}, {end}, {step})"
+
+    # pylint: disable=R0912
+    def statement(self, stmt, depth, indent, want):
+        """Translates a statement; see :meth:`block` for the parameters."""
+        env = _env_name(depth)
+        result = "_r = " if want else ""
+        if isinstance(stmt, VarDeclNode):
+            value = self.expr(stmt.expr, env) if stmt.expr is not None else "None"
+            self.emit(indent, f"{env}_vars[{stmt.name!r}] = {value}")
+        elif isinstance(stmt, AssignmentNode):
+            self.emit(indent, f"{env}.set({stmt.name!r}, {self.expr(stmt.expr, env)})")
+        elif isinstance(stmt, PrintNode):
+            self.emit(indent, f"_interp.emit({self.expr(stmt.expr, env)})")
+        elif isinstance(stmt, FuncDeclNode):
+            self.emit(indent, f"{env}.funcs[{stmt.name!r}] = {self.ref(stmt)}")
+        elif isinstance(stmt, IfNode):
+            self.emit(indent, f"if {self.expr(stmt.cond, env)}:")
+            self.scope(stmt.then_block, depth, indent + 1, want)
+            if stmt.else_block:
+                self.emit(indent, "else:")
+                self.scope(stmt.else_block, depth, indent + 1, want)
+            elif want:
+                self.emit(indent, "else:")
+                self.emit(indent + 1, "_r = None")
+            return
+        elif isinstance(stmt, WhileNode):
+            if want:
+                self.emit(indent, "_r = None")
+            self.emit(indent, f"while {self.expr(stmt.cond, env)}:")
+            self.scope(stmt.body, depth, indent + 1, want)
+            return
+        elif isinstance(stmt, (ForNode, ForEachNode)):
+            if want:
+                self.emit(indent, "_r = None")
+            self.for_loop(stmt, self.loop_values(stmt, env), depth, indent, want)
+            return
+        elif isinstance(stmt, ReturnNode):
+            value = self.expr(stmt.expr, env) if stmt.expr is not None else "None"
+            if self.function:
+                self.emit(indent, f"return {value}")
+            else:
+                self.emit(indent, f"raise _Return({value})")
+            return
+        elif isinstance(stmt, (FuncCallNode, InputNode)):
+            self.emit(indent, result + self.expr(stmt, env))
+            return
+        else:
+            self.emit(indent, result + self.fallback(stmt, env))
+            return
+        if want:
+            self.emit(indent, "_r = None")
+
+    # pylint: disable=R0911
+    def expr(self, node, env):
+        """
+        Translates an expression.
+
+        :param node: The expression node.
+        :param env: The name of the environment variable it is evaluated in.
+        :return: A Python expression.
+        """
+        if isinstance(node, NumberNode):
+            value = node.value
+            if isinstance(value, float) and not math.isfinite(value):
+                return self.fallback(node, env)
+            return repr(value)
+        if isinstance(node, StringNode):
+            return repr(node.value)
+        if isinstance(node, VarAccessNode):
+            if node.name == "true":
+                return "True"
+            if node.name == "false":
+                return "False"
+            # Look in the innermost scope inline before walking the chain.
+            name = repr(node.name)
+            return (
+                f"({env}_vars[{name}] if {name} in {env}_vars else {env}.get({name}))"
+            )
+        if isinstance(node, BinaryOpNode):
+            left = self.expr(node.left, env)
+            right = self.expr(node.right, env)
+            if node.numeric or node.op in _PLAIN_OPS:
+                return f"({left} {node.op} {right})"
+            if node.op == "+":
+                return f"_add({left}, {right})"
+            if node.op == "-":
+                return f"_sub({left}, {right})"
+            if node.op in _LOGICAL:
+                # Both operands are always evaluated, so no short-circuiting.
+                return f"(bool({left}) {_LOGICAL[node.op]} bool({right}))"
+        elif isinstance(node, UnaryOpNode) and node.op in _UNARY:
+            return f"({_UNARY[node.op]}{self.expr(node.operand, env)})"
+        elif isinstance(node, FuncCallNode) and node.name not in ("print", "input"):
+            if not node.args:
+                return f"_call(_interp, {env}, {node.name!r}, _no_args)"
+            args = ", ".join(
+                f"{self.expr(arg, env)} if _n > {index} else None"
+                for index, arg in enumerate(node.args)
+            )
+            return f"_call(_interp, {env}, {node.name!r}, lambda _n: ({args},))"
+        elif isinstance(node, InputNode):
+            return f"input({node.prompt!r})"
+        return self.fallback(node, env)
+
+    # pylint: enable=R0911,R0912
+
+    def build(self, name, params):
+        """
+        Compiles the translated lines as the body of a function.
+
+        :param name: The name of the generated function.
+        :param params: Its parameters, after ``_interp, env``.
+        :return: The compiled function.
+        """
+        header = f"def {name}(_interp, env{''.join(', ' + p for p in params)}):"
+        lines = [header, "    env_vars = env.vars"] + self.lines + ["    return _r", ""]
+        source = "\n".join(lines)
+        namespace = {
+            "Environment": Environment,
+            "_add": _add,
+            "_call": _call,
+            "_for_range": _for_range,
+            "_generator": _generator,
+            "_no_args": _no_args,
+            "_Return": ReturnSignal,
+            "_sub": _sub,
+            "_nodes": tuple(self.nodes),
+        }
+        code = compile(source, f"<tier {name}>", "exec")
+        exec(code, namespace)  # pylint: disable=W0122
+        function = namespace[name]
+        function.source = source
+        return function
+
+
+def _env_name(depth):
+    """Returns the generated variable name of the environment at ``depth``."""
+    return f"env{depth}" if depth else "env"
+
+
+def translate_function(func):
+    """
+    Compiles a function body.
+
+    :param func: The FuncDeclNode.
+    :return: A function taking ``(interp, env)`` that runs the body in ``env`` and
+             returns its result.
+    """
+    translator = _Translator(function=True)
+    translator.block(func.body, 0, 1, True)
+    return translator.build("_tier_function", ())
+
+
+def translate_loop(loop):
+    """
+    Compiles a while or for loop.
+
+    :param loop: The WhileNode, ForNode or ForEachNode.
+    :return: For a WhileNode, a function taking ``(interp, env, result)`` that runs
+             the loop in ``env`` and returns its result, or ``result`` if it does
+             not iterate. For a ForNode or ForEachNode, a function taking ``(interp,
+             env, values, result)``, which runs the loop over the remaining
+             ``values`` of its variable.
+    """
+    translator = _Translator(function=False)
+    if isinstance(loop, (ForNode, ForEachNode)):
+        translator.for_loop(loop, "_values", 0, 1, True)
+        return translator.build("_tier_loop", ("_values", "_r"))
+    translator.emit(1, f"while {translator.expr(loop.cond, 'env')}:")
+    translator.scope(loop.body, 0, 2, True)
+    return translator.build("_tier_loop", ("_r",))
+
+
+def describe(node):  # pylint: disable=R0911
+    """
+    Renders an expression back to MyLang source, for reports.
+
+    :param node: The expression node.
+    :return: The source text.
+    """
+    if isinstance(node, StringNode):
+        return f'"{node.value}"'
+    if isinstance(node, NumberNode):
+        return str(node.value)
+    if isinstance(node, VarAccessNode):
+        return node.name
+    if isinstance(node, BinaryOpNode):
+        parts = []
+        for side in (node.left, node.right):
+            text = describe(side)
+            parts.append(f"({text})" if isinstance(side, BinaryOpNode) else text)
+        return f"{parts[0]} {node.op} {parts[1]}"
+    if isinstance(node, UnaryOpNode):
+        separator = " " if node.op == "not" else ""
+        return f"{node.op}{separator}{describe(node.operand)}"
+    if isinstance(node, FuncCallNode):
+        return f"{node.name}({', '.join(describe(arg) for arg in node.args)})"
+    if isinstance(node, InputNode):
+        return f'input("{node.prompt}")'
+    return type(node).__name__
+
+
+class Tier:
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        """
+        Initializes a new Tier.
+
+        :param threshold: How many calls of a function, or iterations of a loop, make
+                          it hot enough to compile.
+        """
+        self.threshold = threshold
+        self.functions = []  # functions called, in order of their first call
+        self.promoted = []  # nodes compiled, in order
+        self.failed = []  # nodes that could not be compiled
+
+    def _promote(self, node, translate):
+        """Compiles a hot node, remembering whether it worked."""
+        try:
+            node.compiled = translate(node)
+        except (SyntaxError, RecursionError, MemoryError):
+            # Nesting beyond what Python's compiler accepts: keep interpreting.
+            node.compiled = False
+            self.failed.append(node)
+        else:
+            if node not in self.promoted:  # compiled again, see common.inference
+                self.promoted.append(node)
+        return node.compiled
+
+    def function_called(self, func):
+        """
+        Records a call of a function that is not compiled yet.
+
+        :param func: The FuncDeclNode, whose ``calls`` already counts this call.
+        :return: The compiled body if the function just became hot, else None or
+                 False (see :meth:`promote_function`).
+        """
+        if func.calls == 1:
+            self.functions.append(func)
+        if func.calls >= self.threshold:
+            return self.promote_function(func)
+        return None
+
+    def promote_function(self, func):
+        """
+        Compiles a hot function, see :func:`translate_function`.
+
+        :param func: The FuncDeclNode.
+        :return: The compiled body, or False if it could not be compiled.
+        """
+        if func.compiled is None:
+            self._promote(func, translate_function)
+        return func.compiled
+
+    def promote_loop(self, loop):
+        """
+        Compiles a hot loop, see :func:`translate_loop`.
+
+        :param loop: The WhileNode, ForNode or ForEachNode.
+        :return: The compiled loop, or False if it could not be compiled.
+        """
+        if loop.compiled is None:
+            self._promote(loop, translate_loop)
+        return loop.compiled
+
+    def report(self):
+        """
+        Summarizes the functions called and the loops compiled.
+
+        :return: The report, one line per function, in order of first call, then one
+                 line per compiled loop.
+        """
+        loops = [
+            node
+            for node in self.promoted + self.failed
+            if isinstance(node, (WhileNode, ForNode, ForEachNode))
+        ]
+        lines = []
+        for node in self.functions + loops:
+            if isinstance(node, FuncDeclNode):
+                label = f"func {node.name}({', '.join(node.params)})"
+                count = f"{node.calls:>10} calls"
+            else:
+                if isinstance(node, ForNode):
+                    bounds = f"{describe(node.start)}..{describe(node.end)}"
+                    label = f"for ({node.name} in {bounds})"
+                elif isinstance(node, ForEachNode):
+                    label = f"for ({node.name} in {describe(node.iterable)})"
+                else:
+                    label = f"while ({describe(node.cond)})"
+                count = f"{node.iterations:>10} iterations"
+            status = {None: "", False: "  not compiled"}.get(
+                node.compiled, "  compiled"
+            )
+            lines.append(f"  {label:40.40} {count}{status}")
+        compiled = sum(isinstance(node, FuncDeclNode) for node in self.promoted)
+        header = (
+            f"Tiering (threshold {self.threshold}): compiled {compiled} of"
+            f" {len(self.functions)} functions called and"
+            f" {len(self.promoted) - compiled} loops"
+        )
+        return "\n".join([header] + lines)
@@ -0,0 +1,205 @@
+"""Watch mode for the MyLang interpreter.
+
+:func:`watch` polls a script and re-runs it after every save, in the same process,
+so the parser tables, the module cache and any compiled hot code stay warm.
+:class:`IncrementalParser` splits the source into top-level statements with a
+cheap scan and only parses the statements whose text changed since the last
+version; every other statement reuses its cached AST.
+
+A reused statement is the same node objects as in the previous run, with the state
+that run left on them. The statement's text is unchanged, so what only depends on
+it stays valid and is kept: the counts of calls and iterations, and the compiled
+code of hot functions and loops. Everything that depends on the rest of the
+program is recomputed before every run (see :func:`main.watch_executor`):
+
+* ``numeric`` on ``+`` and ``-``, by :func:`common.inference.infer_types`, which
+  also drops the compiled code generated for flags that changed;
+* ``pure`` on functions, by :func:`common.purity.mark_pure`, and the memo is
+  cleared;
+* the values of hoisted expressions, which every loop entry computes again.
+
+New run state must follow the same rules: either depend on the statement alone,
+or be reset before every run.
+"""
+
+import os
+import re
+import sys
+import time
+
+from .frontend import parse_checked
+from .nodes import BlockNode
+from .optimizer import optimize
+
+# What the statement splitter needs to see: braces and semicolons, plus strings and
+# comments so that braces and semicolons inside them are ignored.
+_STRUCTURE = re.compile(r'"(?:[^\\"]|\\.)*"|//[^\n]*|[{};]')
+_SKIP = re.compile(r"(?:\s+|//[^\n]*)*")
+_ELSE = re.compile(r"else\b")
+
+
+def split_statements(source):
+    """
+    Finds the source spans of the top-level statements of a program.
+
+    A top-level statement ends at a semicolon or at a closing brace outside any
+    braces, unless an ``else`` follows. Malformed input still yields spans, and the
+    parser reports the errors in them.
+
+    :param source: The program source.
+    :return: A list of ``(start, end)`` offsets, one per statement.
+    """
+    spans = []
+    depth = 0
+    start = _SKIP.match(source).end()
+    for m in _STRUCTURE.finditer(source):
+        text = m.group()
+        if text == "{":
+            depth += 1
+            continue
+        if text == "}":
+            depth -= 1
+            if depth > 0:
+                continue
+            depth = 0
+            if _ELSE.match(source, _SKIP.match(source, m.end()).end()):
+                continue
+        elif text != ";" or depth:
+            continue
+        spans.append((start, m.end()))
+        start = _SKIP.match(source, m.end()).end()
+    if start < len(source):
+        spans.append((start, len(source)))
+    return spans
+
+
+class IncrementalParser:
+    def __init__(self, backend="yacc", optimized=False):
+        """
+        Initializes a new IncrementalParser.
+
+        :param backend: The parser backend to use, either "yacc" or "pratt".
+        :param optimized: Whether to apply the loop optimizations in
+                          :mod:`common.optimizer` to each statement.
+        """
+        self.backend = backend
+        self.optimized = optimized
+        self.reparsed = 0  # statements parsed by the last call to parse()
+        self.total = 0  # statements in the last version parsed
+        self._cache = {}  # statement source -> its parsed statements
+
+    def parse(self, source):
+        """
+        Parses a program, reusing the statements that did not change.
+
+        Errors are reported as usual, with line and column numbers relative to the
+        whole program.
+
+        :param source: The program source.
+        :return: The program's BlockNode, or None if it has errors. Unchanged
+                 statements are the nodes returned last time, see above.
+        """
+        cache = {}
+        statements = []
+        failed = False
+        self.reparsed = 0
+        spans = split_statements(source)
+        for start, end in spans:
+            text = source[start:end]
+            parsed = self._cache.get(text)
+            if parsed is None:
+                parsed = cache.get(text)
+            if parsed is None:
+                self.reparsed += 1
+                parsed = self._parse_span(source, start, end)
+                if parsed is None:
+                    failed = True
+                    continue
+            cache[text] = parsed
+            statements.extend(parsed)
+        # Only keep the statements of this version.
+        self._cache = cache
+        self.total = len(spans)
+        return None if failed else BlockNode(statements)
+
+    def _parse_span(self, source, start, end):
+        """
+        Parses one top-level statement of a program.
+
+        The statement is padded with the newlines and spaces that precede it, so
+        error positions match the whole file.
+
+        :return: The list of parsed statements, or None if there were errors.
+        """
+        line_start = source.rfind("\n", 0, start) + 1
+        padding = "\n" * source.count("\n", 0, start) + " " * (start - line_start)
+        tree, errors = parse_checked(padding + source[start:end], backend=self.backend)
+        if errors or tree is None:
+            return None
+        if self.optimized:
+            tree = optimize(tree)
+        return tree.statements
+
+
+def watch(path, parser, execute, interval=0.1, status=None):
+    """
+    Runs a script, then runs it again every time it changes, until interrupted.
+
+    After each run a status line reports how many statements were re-parsed, the
+    parse and run times and, for re-runs, the time from the save to the end of
+    the output.
+
+    :param path: The path of the script.
+    :param parser: The IncrementalParser to parse it with.
+    :param execute: A callable running a parsed program.
+    :param interval: How often to check the file, in seconds.
+    :param status: The stream the status lines are written to, defaults to stderr.
+    """
+    status = status if status is not None else sys.stderr
+    stamp = None
+    first = True
+    while True:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        new_stamp = (st.st_mtime_ns, st.st_size) if st is not None else None
+        if new_stamp != stamp:
+            stamp = new_stamp
+            if st is None:
+                print(f"[watch] {path}: file not found, waiting", file=status)
+            else:
+                line = _run_once(path, parser, execute)
+                if not first:
+                    saved_ms = (time.time_ns() - st.st_mtime_ns) / 1e6
+                    line += f", {saved_ms:.0f} ms from save to output"
+                print(line, file=status, flush=True)
+                first = False
+        time.sleep(interval)
+
+
+def _run_once(path, parser, execute):
+    """
+    Parses and runs a script once.
+
+    :return: The status line describing the run.
+    """
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    started = time.perf_counter()
+    tree = parser.parse(source)
+    parsed = time.perf_counter()
+    if tree is not None:
+        try:
+            execute(tree)
+        except Exception as e:
+            print(f"[Error] {e}")
+    sys.stdout.flush()
+    finished = time.perf_counter()
+    line = (
+        f"[watch] {os.path.basename(path)}: re-parsed {parser.reparsed} of"
+        f" {parser.total} statements in {(parsed - started) * 1000:.1f} ms"
+    )
+    if tree is None:
+        return line + ", not run (errors)"
+    return line + f", ran in {(finished - parsed) * 1000:.1f} ms"
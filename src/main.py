@@ -1,21 +1,256 @@
 """Main module."""
 
-from common.interpreter import Interpreter
-from common.parser import parse
+import argparse
+import os
+import sys
+import time
 
+from common.fastlexer import FastLexer, load_source
+from common.frontend import BACKENDS, parse
+from common.inference import infer_types
+from common.interpreter import MODULES, Interpreter
+from common.lexer import lexer as ply_lexer
+from common.metrics import Metrics
+from common.nodes import SpawnNode, walk
+from common.optimizer import optimize
+from common.parallel import SerialPool, WorkerPool
+from common.purity import DEFAULT_SIZE, Memo, mark_pure
+from common.rules import FORMATS, process, read_records, write_results
+from common.snapshot import load_snapshot, save_snapshot
+from common.tiering import DEFAULT_THRESHOLD, Tier
+from common.watch import IncrementalParser, watch
 
-def run_file(path):
+
+def load_program(path, lexer=None, backend="yacc"):
+    """Parses a given My-Lang file.
+
+    :param path: The path to the My-Lang file to parse.
+    :param lexer: The lexer backend to use, either "ply" or "fast". The fast
+                  backend maps the file into memory instead of reading it.
+                  Defaults to "ply" for the yacc parser and "fast" for the
+                  Pratt parser.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :return: The parsed program.
+    """
+    if lexer is None:
+        lexer = "fast" if backend == "pratt" else "ply"
+    if lexer == "fast":
+        return parse(load_source(path), backend=backend, lexer=FastLexer())
+    with open(path, encoding="utf-8") as f:
+        code = f.read()
+    if backend == "pratt":
+        return parse(code, backend=backend, lexer=ply_lexer)
+    return parse(code)
+
+
+# pylint: disable=R0913
+def worker_pool(
+    path,
+    ast,
+    backend="yacc",
+    optimized=False,
+    *,
+    tier=None,
+    workers=None,
+    snapshot=None,
+):
+    """Creates the pool of worker processes for a program that uses ``spawn``.
+
+    :param path: The path to the My-Lang file, which the workers parse.
+    :param ast: The parsed program.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param optimized: Whether to apply the loop optimizations in :mod:`common.optimizer`.
+    :param tier: The :class:`common.tiering.Tier` compiling hot code, or None.
+    :param workers: The number of worker processes, defaults to the CPU count.
+    :param snapshot: The snapshot file the program is restored from, or None.
+    :return: The :class:`common.parallel.WorkerPool`, or None if the program never
+             spawns a call.
+    """
+    if not any(isinstance(node, SpawnNode) for node in walk(ast)):
+        return None
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return WorkerPool(
+        source,
+        backend,
+        optimized,
+        base_dir,
+        workers=workers,
+        tier=tier,
+        snapshot=snapshot,
+    )
+
+
+def run_file(
+    path,
+    lexer=None,
+    backend="yacc",
+    optimized=False,
+    tier=None,
+    *,
+    snapshot=None,
+    save_to=None,
+    memo=None,
+    metrics=None,
+    workers=None,
+    type_report=False,
+):
     """Runs a given My-Lang file.
 
     :param path: The path to the My-Lang file to run.
+    :param lexer: The lexer backend to use, see :func:`load_program`.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param optimized: Whether to apply the loop optimizations in :mod:`common.optimizer`.
+    :param tier: The :class:`common.tiering.Tier` compiling hot code, or None.
+    :param snapshot: A snapshot file to restore the global environment from before
+                     running, see :mod:`common.snapshot`.
+    :param save_to: A file to save a snapshot of the global environment to after
+                    running.
+    :param memo: The :class:`common.purity.Memo` caching pure function results, or
+                 None.
+    :param metrics: The :class:`common.metrics.Metrics` to count into, or None.
+    :param workers: The number of worker processes running spawned calls, see
+                    :mod:`common.parallel`; defaults to the CPU count.
+    :param type_report: Whether to print the mixed-type sites found by
+                        :mod:`common.inference` to stderr before running. Type
+                        inference also runs when ``optimized`` is set.
+    """
+    ast = load_program(path, lexer=lexer, backend=backend)
+    if optimized:
+        ast = optimize(ast)
+    if memo is not None:
+        mark_pure(ast)
+    pool = worker_pool(
+        path, ast, backend, optimized, tier=tier, workers=workers, snapshot=snapshot
+    )
+    interp = Interpreter(
+        base_dir=os.path.dirname(os.path.abspath(path)),
+        tier=tier,
+        memo=memo,
+        metrics=metrics,
+        pool=pool,
+    )
+    try:
+        if snapshot is not None:
+            load_snapshot(interp, snapshot)
+        if optimized or type_report:
+            inference = infer_types(ast, interp.global_env.funcs.values())
+            if type_report:
+                print(inference.report(), file=sys.stderr)
+        interp.visit(ast)
+        if save_to is not None:
+            save_snapshot(interp, save_to)
+    finally:
+        if pool is not None:
+            pool.close()
+
+
+def watch_file(
+    path, backend="yacc", optimized=False, tier=None, *, memo=None, metrics=None
+):
+    """Runs a given My-Lang file again every time it is saved, until interrupted.
+
+    :param path: The path to the My-Lang file to run.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param optimized: Whether to apply the loop optimizations in :mod:`common.optimizer`.
+    :param tier: The :class:`common.tiering.Tier` compiling hot code, or None.
+    :param memo: The :class:`common.purity.Memo` caching pure function results, or
+                 None. It is cleared before every run, since an edit can change
+                 what a function computes without changing its declaration.
+    :param metrics: The :class:`common.metrics.Metrics` every run counts into, or
+                    None.
+    """
+    parser = IncrementalParser(backend=backend, optimized=optimized)
+    execute = watch_executor(path, optimized, tier, memo=memo, metrics=metrics)
+    try:
+        watch(path, parser, execute)
+    except KeyboardInterrupt:
+        print("Saindo.")
+
+
+def watch_executor(path, optimized=False, tier=None, *, memo=None, metrics=None):
+    """Creates the function running each version of a watched file.
+
+    The parameters are those of :func:`watch_file`.
+
+    :return: A callable running a program parsed by an IncrementalParser.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def execute(ast):
+        if memo is not None:
+            memo.clear()
+            mark_pure(ast)
+        if optimized:
+            # Statements are parsed and optimized one by one, but types flow
+            # between them.
+            infer_types(ast)
+        interp = Interpreter(
+            base_dir=base_dir, tier=tier, memo=memo, metrics=metrics, pool=SerialPool()
+        )
+        interp.visit(ast)
+
+    return execute
+
+
+# pylint: enable=R0913
+
+
+# pylint: disable=R0913
+def run_rules(
+    path,
+    records_path,
+    backend="yacc",
+    optimized=False,
+    tier=None,
+    *,
+    fmt=None,
+    results_path=None,
+    shards=1,
+):
+    """Runs a given My-Lang file once per record of a JSON Lines or CSV file.
+
+    The results are written as JSON Lines, and the throughput is reported on stderr.
+
+    :param path: The path to the My-Lang file to run.
+    :param records_path: The file of records, see :func:`common.rules.read_records`.
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param optimized: Whether to apply the loop optimizations in :mod:`common.optimizer`.
+    :param tier: The :class:`common.tiering.Tier` compiling hot code, or None.
+    :param fmt: The format of the records, "jsonl" or "csv"; defaults to the file's
+                extension.
+    :param results_path: The file to write the results to, defaults to stdout.
+    :param shards: The number of worker processes to spread the records over.
     """
     with open(path, encoding="utf-8") as f:
-        code = f.read()
-    ast = parse(code)
-    Interpreter().visit(ast)
+        results = process(
+            f.read(),
+            read_records(records_path, fmt),
+            backend,
+            optimized,
+            os.path.dirname(os.path.abspath(path)),
+            tier=tier,
+            shards=shards,
+        )
+    started = time.perf_counter()
+    if results_path is None:
+        count, errors = write_results(results, sys.stdout)
+    else:
+        with open(results_path, "w", encoding="utf-8") as out:
+            count, errors = write_results(results, out)
+    elapsed = time.perf_counter() - started
+    print(
+        f"[rules] {count} records in {elapsed:.2f} s"
+        f" ({count / elapsed if elapsed else 0:.0f} records/s), {errors} errors",
+        file=sys.stderr,
+    )
+
+
+# pylint: enable=R0913
 
 
-def repl():
+def repl(backend="yacc", tier=None, metrics=None):
     """Runs an interactive My-Lang shell.
 
     This function runs an infinite loop in which it reads a line of input from
@@ -24,14 +259,18 @@ def repl():
     the loop continues immediately. If the user enters an invalid program, the
     error is printed to the console. The loop can be broken by entering EOF
     (usually by pressing Ctrl+D in the terminal).
+
+    :param backend: The parser backend to use, either "yacc" or "pratt".
+    :param tier: The :class:`common.tiering.Tier` compiling hot code, or None.
+    :param metrics: The :class:`common.metrics.Metrics` to count into, or None.
     """
-    interp = Interpreter()
+    interp = Interpreter(tier=tier, metrics=metrics, pool=SerialPool())
     while True:
         try:
             line = input(">>> ")
             if not line.strip():
                 continue
-            ast = parse(line)
+            ast = parse(line, backend=backend)
             result = interp.visit(ast)
             if result is not None:
                 print(result)
@@ -42,10 +281,238 @@ def repl():
             print(f"[Error] {e}")
 
 
-if __name__ == "__main__":
-    import sys
+def dump_metrics(metrics, fmt, path=None):
+    """Writes the runtime counters of a run.
 
-    if len(sys.argv) > 1:
-        run_file(sys.argv[1])
+    :param metrics: The :class:`common.metrics.Metrics` to dump.
+    :param fmt: The output format, either "json" or "prometheus".
+    :param path: The file to write, defaults to stderr.
+    """
+    text = metrics.to_json() + "\n" if fmt == "json" else metrics.to_prometheus()
+    if path is None:
+        sys.stderr.write(text)
     else:
-        repl()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def main(argv=None):
+    """Parses the command line and runs a file or the REPL.
+
+    :param argv: The command line arguments, defaults to ``sys.argv[1:]``.
+    """
+    arg_parser = argparse.ArgumentParser(description="Run My-Lang programs.")
+    arg_parser.add_argument("path", nargs="?", help="the .mylang file to run")
+    arg_parser.add_argument(
+        "--lexer",
+        choices=("ply", "fast"),
+        help="lexer backend (default: ply with yacc, fast with pratt)",
+    )
+    arg_parser.add_argument(
+        "--parser",
+        choices=BACKENDS,
+        default="yacc",
+        help="parser backend (default: yacc)",
+    )
+    arg_parser.add_argument(
+        "-O",
+        "--optimize",
+        action="store_true",
+        help="run counted loops natively, hoist loop-invariant expressions and"
+        " skip type checks on arithmetic proven numeric",
+    )
+    arg_parser.add_argument(
+        "--type-report",
+        action="store_true",
+        help="print the mixed-type sites found by type inference to stderr",
+    )
+    arg_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="run the file again on every save, re-parsing only what changed",
+    )
+    arg_parser.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="restore the global variables and functions from FILE before running",
+    )
+    arg_parser.add_argument(
+        "--save-snapshot",
+        metavar="FILE",
+        help="save the global variables and functions to FILE after running",
+    )
+    arg_parser.add_argument(
+        "--tier",
+        action="store_true",
+        help="compile hot functions and loops to Python (default: only tree-walk)",
+    )
+    arg_parser.add_argument(
+        "--tier-threshold",
+        type=int,
+        metavar="N",
+        help=f"calls or iterations before code is compiled (default: {DEFAULT_THRESHOLD})",
+    )
+    arg_parser.add_argument(
+        "--tier-stats",
+        action="store_true",
+        help="print call counts and compiled functions to stderr on exit",
+    )
+    arg_parser.add_argument(
+        "--memoize",
+        action="store_true",
+        help="cache the results of functions that only depend on their arguments",
+    )
+    arg_parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=DEFAULT_SIZE,
+        metavar="N",
+        help=f"results kept by --memoize, least recently used first out (default: {DEFAULT_SIZE})",
+    )
+    arg_parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="print memoization hits and misses to stderr on exit",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="worker processes running spawned calls (default: the CPU count)",
+    )
+    arg_parser.add_argument(
+        "--records",
+        metavar="FILE",
+        help="run the file once per record of FILE (JSON Lines, or CSV if FILE ends"
+        " in .csv), binding the fields as variables",
+    )
+    arg_parser.add_argument(
+        "--records-format",
+        choices=FORMATS,
+        help="format of the --records file (default: from its extension)",
+    )
+    arg_parser.add_argument(
+        "--results",
+        metavar="FILE",
+        help="write the --records results to FILE instead of stdout",
+    )
+    arg_parser.add_argument(
+        "--shards",
+        type=int,
+        metavar="N",
+        help="spread the --records over N worker processes (default: 1)",
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        choices=("json", "prometheus"),
+        help="dump runtime counters on exit, as JSON or Prometheus text",
+    )
+    arg_parser.add_argument(
+        "--metrics-file",
+        metavar="FILE",
+        help="write the --metrics dump to FILE instead of stderr",
+    )
+    args = arg_parser.parse_args(argv)
+    _check_modes(arg_parser, args)
+    MODULES.backend = args.parser
+    tier = None
+    if args.tier:
+        threshold = args.tier_threshold
+        tier = Tier(DEFAULT_THRESHOLD if threshold is None else threshold)
+    memo = Memo(args.memo_size) if args.memoize else None
+
+    metrics = Metrics()
+
+    try:
+        if args.path and args.records:
+            run_rules(
+                args.path,
+                args.records,
+                backend=args.parser,
+                optimized=args.optimize,
+                tier=tier,
+                fmt=args.records_format,
+                results_path=args.results,
+                shards=args.shards or 1,
+            )
+        elif args.path and args.watch:
+            watch_file(
+                args.path,
+                backend=args.parser,
+                optimized=args.optimize,
+                tier=tier,
+                memo=memo,
+                metrics=metrics,
+            )
+        elif args.path:
+            run_file(
+                args.path,
+                lexer=args.lexer,
+                backend=args.parser,
+                optimized=args.optimize,
+                tier=tier,
+                snapshot=args.snapshot,
+                save_to=args.save_snapshot,
+                memo=memo,
+                metrics=metrics,
+                workers=args.workers,
+                type_report=args.type_report,
+            )
+        else:
+            repl(backend=args.parser, tier=tier, metrics=metrics)
+    finally:
+        if args.tier_stats and tier is not None:
+            print(tier.report(), file=sys.stderr)
+        if args.memo_stats and memo is not None:
+            print(memo.report(), file=sys.stderr)
+        if args.metrics:
+            dump_metrics(metrics, args.metrics, args.metrics_file)
+
+
+def _check_modes(arg_parser, args):
+    """Rejects the options that the selected mode would ignore."""
+    if not args.tier:
+        tier_only = {
+            "--tier-threshold": args.tier_threshold is not None,
+            "--tier-stats": args.tier_stats,
+        }
+        used = [flag for flag, value in tier_only.items() if value]
+        if used:
+            arg_parser.error(f"{', '.join(used)} can only be used with --tier")
+    if not args.records:
+        records_only = {
+            "--records-format": args.records_format,
+            "--results": args.results,
+            "--shards": args.shards,
+        }
+        used = [flag for flag, value in records_only.items() if value is not None]
+        if used:
+            arg_parser.error(f"{', '.join(used)} can only be used with --records")
+    if args.records:
+        mode = "--records"
+        ignored = {
+            "--lexer": args.lexer,
+            "--memoize": args.memoize,
+            "--snapshot": args.snapshot,
+            "--save-snapshot": args.save_snapshot,
+            "--type-report": args.type_report,
+            "--workers": args.workers,
+        }
+    elif args.watch:
+        mode = "--watch"
+        ignored = {
+            "--lexer": args.lexer,
+            "--snapshot": args.snapshot,
+            "--save-snapshot": args.save_snapshot,
+            "--type-report": args.type_report,
+            "--workers": args.workers,
+        }
+    else:
+        return
+    used = [flag for flag, value in ignored.items() if value]
+    if used:
+        arg_parser.error(f"{', '.join(used)} cannot be used with {mode}")
+
+
+if __name__ == "__main__":
+    main()